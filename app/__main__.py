@@ -10,10 +10,14 @@ import autosim.estimation as e
 import autosim.simulation as s
 import autosim.car as c
 from eventloop.eventloop import Event
+from eventloop.eventloop import RemoveListener
+from eventloop.journal import Journal, JournalPlayer, JournalWriter
+from eventloop.tracing import JsonlTracer, TeeTracer
 from helpers import kph_to_mps, measure_time, not_implemented, coalesce, indent, SmartEnum
 from renderer import Renderer
 from simulation import Environment, Body
 from simulation.location import Circle, CircleSpace, Line
+from simulation.moveable.events import Move
 import argparse
 import matplotlib.pyplot as plt
 import numpy as np
@@ -252,10 +256,29 @@ def estimate_population_generations(architecture: NetworkArchitecture, populatio
     return population, generations
 
 @measure_time
-def simulate(network: NeuralNetwork, renderer: Renderer, strategy: str, no_dummy: bool):
+def simulate(network: NeuralNetwork, renderer: Renderer, strategy: str, no_dummy: bool, stats: bool, trace: str, journal: str, replay: bool):
     parameters = get_testing_simulation_parameters(network, renderer, strategy, no_dummy)
-    autosim.simulate(parameters)
+    parameters.stats = stats
+    if replay:
+        parameters.replay = JournalPlayer(Journal.read(journal), parameters.objects)
+        logging.info(f"replaying event journal \"{journal}\"")
+    tracers = []
+    if trace:
+        tracers.append(JsonlTracer(trace))
+    if journal and not replay:
+        tracers.append(JournalWriter(journal, events={Move, RemoveListener}, senders={Body}))
+    if tracers:
+        parameters.tracer = tracers[0] if len(tracers) == 1 else TeeTracer(*tracers)
+    environment = autosim.simulate(parameters)
+    if tracers:
+        parameters.tracer.close()
+    if trace:
+        logging.info(f"event loop trace written to \"{trace}\"")
+    if journal and not replay:
+        logging.info(f"event journal written to \"{journal}\"")
     logging.info( f"simulated {parameters.timeout}s ({renderer.fps * parameters.timeout} {renderer.width}x{renderer.height} frames)")
+    if stats:
+        logging.info(f"event loop statistics:\n{environment.loop.stats().summary()}")
 
 @measure_time
 def render(renderer: Renderer, dir: str, name: str):
@@ -317,8 +340,11 @@ def action_render(args):
 
     for solution, file in zip(solutions, files):
         renderer = Renderer(args.fps, args.width, args.height, args.text)
-        simulate(solution, renderer, file.stem, args.no_dummy)
-        render(renderer, file.parent, file.stem + ('-no-dummy' if args.no_dummy else ''))
+        name = file.stem + ('-no-dummy' if args.no_dummy else '')
+        trace = os.path.join(file.parent, file.stem + '.trace.jsonl') if args.trace else None
+        journal = os.path.join(file.parent, name + '.journal') if args.journal or args.replay else None
+        simulate(solution, renderer, file.stem, args.no_dummy, args.stats, trace, journal, args.replay)
+        render(renderer, file.parent, name)
 
 def action_help(parser):
     parser.print_help()
@@ -427,12 +453,20 @@ def make_parser():
                            help='Rendered text. Available options: n,x,u,vms,vkh.')
     rendering.add_argument('--no-dummy', default=False, action='store_true',
                            help='Do not use dummy for simulations.')
+    rendering.add_argument('--journal', action='store_true', default=False,
+                           help='Write event journal of rendered simulations next to solutions (<strategy>.journal).')
+    rendering.add_argument('--replay', action='store_true', default=False,
+                           help='Replay rendered simulations from journals written with --journal instead of simulating cars.')
 
     other = parser.add_argument_group('other')
     other.add_argument('-l', '--log-level', default='info',
                            choices=['critical', 'fatal', 'error',
                                     'warning', 'info', 'debug'],
                            help='Logging level.')
+    other.add_argument('--stats', action='store_true', default=False,
+                           help='Log event loop statistics of rendered simulations.')
+    other.add_argument('--trace', action='store_true', default=False,
+                           help='Write event loop trace of rendered simulations next to solutions (<strategy>.trace.jsonl).')
 
     return parser
 
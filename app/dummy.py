@@ -60,6 +60,7 @@ class DummyCar(c.Car):
 
         self.state = States.ACCELERATE
         self.t0 = None
+        self.u = 0
     
     def next_state(self):
         self.state = self.state.next()
@@ -77,6 +78,16 @@ class DummyCar(c.Car):
             self.next_state()
 
         return self.accelerate(self.u, environment.dt)
+
+    def snapshot(self):
+        return super().snapshot(), self.state, self.t0, self.u
+
+    def restore(self, state):
+        body, self.state, self.t0, self.u = state
+        super().restore(body)
+
+    def move_state(self) -> dict:
+        return {'v': self.v, 'u': self.u}
     
     def accept(self, event: Event) -> list[Event]:
         if isinstance(event, Collision):
@@ -0,0 +1,18 @@
+from autosim import EstimationStrategy, Criteria, ReferenceCriteria, SimulationParameters, batch_fitness, fitness
+from autosim.car import ACar
+from simulation.location import Line
+
+
+STRATEGY = EstimationStrategy(collision=Criteria(1000), speed=ReferenceCriteria(1, 15), distance=ReferenceCriteria(1, 30))
+PARAMETERS = SimulationParameters(timeout=2, objects=[ACar('0.3', location=Line(50), name='trainer')])
+
+
+def targets(n):
+    return [ACar(f"{i / n}") for i in range(n)]
+
+
+def test_serial_worlds_100(benchmark):
+    benchmark(lambda: [fitness(target, PARAMETERS, STRATEGY) for target in targets(100)])
+
+def test_batch_worlds_100(benchmark):
+    benchmark(lambda: batch_fitness(targets(100), PARAMETERS, STRATEGY))
@@ -0,0 +1,45 @@
+from autosim.car import ACar
+from autosim.car.expression import evaluator, vectorize
+from simulation import Environment
+from simulation.location import Circle, CircleSpace
+from simulation.math.rk2a import rk2a_motion
+import numpy
+import pytest
+
+
+N = 1_000
+
+
+def ring(integrator, tabulate: bool = False) -> Environment:
+    """Crowded ring of accelerating cars."""
+    space = CircleSpace(20 * N)
+    environment = Environment(integrator=integrator)
+    cars = [ACar('0.5 + 0.1 * sin(t)', location=Circle(space, 20 * i)) for i in range(N)]
+    if tabulate:
+        for car in cars:
+            car.tabulate(100, environment.dt)
+    environment.subscribe(*cars)
+    environment.iterate()
+    return environment
+
+
+@pytest.mark.parametrize('integrator', [lambda *args: rk2a_motion(*args), 'rk2'], ids=['single', 'batched'])
+def test_car_ticks(benchmark, integrator):
+    # Any integrator, but rk2a_motion itself, pushes cars one by one.
+    benchmark(ring(integrator).iterate)
+
+
+def test_tabulated_car_ticks(benchmark):
+    benchmark(ring('rk2', tabulate=True).iterate)
+
+
+GRID = numpy.arange(10_000) * 0.01
+
+
+def test_evaluate_expression_grid(benchmark):
+    f = evaluator('0.5 + 0.1 * sin(t)')
+    benchmark(lambda: [f(t, 0.01) for t in GRID.tolist()])
+
+
+def test_vectorized_expression_grid(benchmark):
+    benchmark(vectorize('0.5 + 0.1 * sin(t)'), GRID, 0.01)
@@ -0,0 +1,47 @@
+from autosim.car import ACar
+from simulation import Body, Environment
+from simulation.location import Circle, CircleSpace
+from simulation.moveable.events import Move
+import numpy
+import pytest
+
+
+def environment(bodies, arrays):
+    rng = numpy.random.default_rng(0)
+    space = CircleSpace(10 * bodies)
+    environment = Environment(arrays=arrays)
+    environment.subscribe(*[Body(Circle(space, float(x)), 1) for x in numpy.sort(rng.random(bodies) * 10 * bodies)])
+    environment.iterate()
+    moves = []
+    for body in environment.bodies:
+        move = Move(float(rng.random() * 20))
+        move.sender = body
+        moves.append(move)
+    environment.handle_moves(moves)
+    return environment
+
+
+def test_paths_bodies_1_000(benchmark):
+    benchmark(environment(1_000, False)._detect_collision_paths)
+
+def test_vectorized_bodies_1_000(benchmark):
+    benchmark(environment(1_000, False).detect_collision)
+
+def test_vectorized_arrays_bodies_1_000(benchmark):
+    benchmark(environment(1_000, True).detect_collision)
+
+
+def pile_up(bodies, arrays):
+    """Environment, in which every other car runs into the next one on the first tick."""
+    space = CircleSpace(20 * bodies)
+    environment = Environment(arrays=arrays)
+    speeds = [f"{3000 if i % 2 == 0 else 1} * dt" for i in range(bodies)]
+    environment.subscribe(*[ACar(speed, ACar.Mode.MOVEMENT, location=Circle(space, 20.0 * i)) for i, speed in enumerate(speeds)])
+    environment.iterate()
+    return environment
+
+
+@pytest.mark.parametrize('arrays', [False, True], ids=['objects', 'arrays'])
+def test_pile_up_bodies_2_000(benchmark, arrays):
+    # Collisions of the first moves and removal of half of the cars.
+    benchmark.pedantic(lambda environment: environment.iterate(), setup=lambda: ((pile_up(2_000, arrays),), {}), rounds=5)
@@ -34,3 +34,13 @@ def test_iteration_10_000_second_100_listener_100(benchmark):
 
 def test_iteration_100_second_1_listener_100(benchmark):
     benchmark(bench, 100, 100)
+
+def bench_unsubscribe(listener):
+    loop = EventLoop()
+    listeners = [Countdown(1) for _ in range(listener)]
+    loop.subscribe_many(listeners)
+    for l in listeners:
+        loop.unsubscribe(l)
+
+def test_unsubscribe_listener_10_000(benchmark):
+    benchmark(bench_unsubscribe, 10_000)
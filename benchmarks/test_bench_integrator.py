@@ -0,0 +1,47 @@
+from autosim.car import ACar
+from simulation.math.integrators import INTEGRATORS
+from simulation.math.rk2a import rk2a, rk2a_motion
+import numpy
+import pytest
+
+
+CAR = ACar('0')
+FORCE = CAR.get_force(0.5)
+
+
+def generic():
+    return rk2a(lambda xv, t: numpy.asarray([xv[1], FORCE(t, xv[0], xv[1]) / CAR.mass]), [0, 10.0], [0, 0.01])[-1]
+
+
+def motion():
+    return rk2a_motion(FORCE, CAR.mass, 10.0, 0.01)
+
+
+def test_rk2a_step(benchmark):
+    benchmark(generic)
+
+
+def test_rk2a_motion_step(benchmark):
+    benchmark(motion)
+
+
+def drive(step, dt: float, seconds: float = 10.0) -> tuple[float, float]:
+    """Distance and speed of CAR accelerating, then breaking, integrated with step."""
+    x, v = 0.0, 0.0
+    for i in range(round(seconds / dt)):
+        force = CAR.get_force(1.0 if i * dt < seconds * 0.8 else -0.2)
+        dx, v = step(force, CAR.mass, v, dt)
+        x += dx
+    return x, v
+
+
+REFERENCE = drive(INTEGRATORS['rk4'], 1e-3)
+
+
+@pytest.mark.parametrize('name', INTEGRATORS)
+def test_integrator_step(benchmark, name):
+    step = INTEGRATORS[name]
+    x, v = drive(step, 0.1)
+    benchmark.extra_info['distance error, m'] = abs(x - REFERENCE[0])
+    benchmark.extra_info['speed error, m/s'] = abs(v - REFERENCE[1])
+    benchmark(step, FORCE, CAR.mass, 10.0, 0.1)
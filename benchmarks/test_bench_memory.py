@@ -0,0 +1,65 @@
+from autosim.car import ACar
+from simulation import Body, Environment
+from simulation.location import Circle, CircleSpace
+from simulation.moveable.events import Move
+import tracemalloc
+
+
+N = 1_000
+
+
+def allocated(create) -> tuple[list, int]:
+    """Objects created and bytes still allocated by them."""
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        objects = create()
+        return objects, tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+
+def cars():
+    space = CircleSpace(20 * N)
+    return [ACar(function='0.5', location=Circle(space, 20 * i)) for i in range(N)]
+
+
+def bodies():
+    space = CircleSpace(20 * N)
+    return [Body(Circle(space, 20 * i), 1000) for i in range(N)]
+
+
+def moves():
+    return [Move(0.5) for _ in range(N)]
+
+
+def test_bytes_per_car(benchmark):
+    _, size = allocated(cars)
+    benchmark.extra_info['bytes per car'] = size / N
+    benchmark(cars)
+
+
+def test_bytes_per_body(benchmark):
+    _, size = allocated(bodies)
+    benchmark.extra_info['bytes per body'] = size / N
+    benchmark(bodies)
+
+
+def test_bytes_per_event(benchmark):
+    _, size = allocated(moves)
+    benchmark.extra_info['bytes per event'] = size / N
+    benchmark(moves)
+
+
+def test_bytes_per_car_tick(benchmark):
+    environment = Environment()
+    environment.subscribe(*cars())
+    environment.iterate()
+
+    tracemalloc.start()
+    try:
+        environment.iterate()
+        benchmark.extra_info['peak bytes per car tick'] = tracemalloc.get_traced_memory()[1] / N
+    finally:
+        tracemalloc.stop()
+    benchmark(environment.iterate)
@@ -0,0 +1,30 @@
+from autosim.car import ACar
+from simulation import Environment
+from simulation.location import Circle, CircleSpace
+import numpy
+import pytest
+
+
+N = 2_000
+
+
+def cars() -> list[ACar]:
+    space = CircleSpace(20 * N)
+    return [ACar('0.5', location=Circle(space, float(x))) for x in numpy.random.default_rng(1).permutation(N) * 20]
+
+
+def subscribe(environment: Environment, listeners: list):
+    environment.subscribe(*listeners)
+    # Added by the first iteration.
+    environment.iterate()
+
+
+def add_many(environment: Environment, listeners: list):
+    environment.add_many(listeners)
+    environment.iterate()
+
+
+@pytest.mark.parametrize('arrays', [False, True], ids=['objects', 'arrays'])
+@pytest.mark.parametrize('add', [subscribe, add_many])
+def test_populate(benchmark, arrays, add):
+    benchmark.pedantic(add, setup=lambda: ((Environment(arrays=arrays), cars()), {}), rounds=5)
@@ -1,6 +1,6 @@
 
-from autosim.autosim import simulate, fitness
-from autosim.simulation import SimulationParameters
+from autosim.autosim import simulate, fitness, fork_fitness, batch_fitness
+from autosim.simulation import SimulationParameters, Fork
 from autosim.estimation import EstimationStrategy, Criteria, ReferenceCriteria
 from autosim.training import GeneticAlgorithmParameters, TrainingSuite, TrainingStrategy, Population, TrainingSession
 from autosim.ncarwatcher.ncarwatcher import NCarWatcher
@@ -4,6 +4,7 @@ import autosim.estimation
 import autosim.simulation
 import autosim.training
 import copy
+import simulation
 import sys
 
 
@@ -17,13 +18,33 @@ def simulate(parameters: autosim.simulation.SimulationParameters):
 def fitness(target: autosim.car.Car, simulation_parameters: autosim.simulation.SimulationParameters, strategy: autosim.estimation.EstimationStrategy) -> float:
     """Evaluates fitness as 1 / fine. Does not apply any side effects.
     """
+    return fork_fitness(target, autosim.simulation.Fork(simulation_parameters), strategy)
+
+def fork_fitness(target: autosim.car.Car, fork: autosim.simulation.Fork, strategy: autosim.estimation.EstimationStrategy) -> float:
+    """Evaluates fitness as 1 / fine, simulating from the fork. Reuse the fork to evaluate many targets.
+    """
     estimator = autosim.estimation.EstimatorObject(target=target, strategy=strategy)
 
-    simulation_parameters = copy.deepcopy(simulation_parameters)
-    simulation_parameters.objects += [target, estimator]
+    fork.simulate(target, estimator)
 
-    simulate(simulation_parameters)
+    return _fitness(estimator)
 
+def batch_fitness(targets: list[autosim.car.Car], simulation_parameters: autosim.simulation.SimulationParameters, strategy: autosim.estimation.EstimationStrategy) -> list[float]:
+    """Evaluates fitnesses of targets as fitness does, simulating all of them in lock-step, see simulation.BatchEnvironment.
+    Parameters' driver, stats, tracer and replay are not supported.
+    """
+    estimators = [autosim.estimation.EstimatorObject(target=target, strategy=strategy) for target in targets]
+    worlds = [copy.deepcopy(simulation_parameters.objects) + [target, estimator] for target, estimator in zip(targets, estimators)]
+    # Objects of parameters are tabulated as by Simulation, copies share tables.
+    for world in worlds:
+        for object in world[:-2]:
+            if isinstance(object, autosim.car.ACar):
+                object.tabulate(simulation_parameters.timeout, simulation_parameters.dt)
+    simulation.BatchEnvironment(worlds, dt=simulation_parameters.dt, timeout=simulation_parameters.timeout,
+                                integrator=simulation_parameters.integrator).simulate()
+    return [_fitness(estimator) for estimator in estimators]
+
+def _fitness(estimator: autosim.estimation.EstimatorObject) -> float:
     if estimator.fine == 0:
         return sys.float_info.max
     else:
@@ -1,12 +1,29 @@
+from dataclasses import dataclass
 from enum import IntEnum, auto
+from functools import lru_cache
 from autosim.car import specs
 from autosim.car.car import Car, Friction
-from cexprtk import Expression, Symbol_Table
+from autosim.car.expression import evaluator, tabulate
 from simulation.location import Location, Line
+from simulation.math.rk2a import rk2a_motion
 from simulation.moveable.events import Move
+import numpy
+
+
+@dataclass(frozen=True)
+class Trajectory:
+    """Pushes of an accelerating car alone, update by update, see ACar.tabulate.
+    Distances rather than positions are kept, so replayed moves are the integrated ones bit for bit.
+    """
+    dx: numpy.ndarray
+    """Distance moved during update i."""
+    v: numpy.ndarray
+    """Speed before update i, one more than distances."""
 
 
 class ACar(Car):
+    __slots__ = ('mode', 'function', 'expression', '_table', '_table_dt', '_trajectory')
+
     class Mode(IntEnum):
         MOVEMENT = auto()
         ACCELERATION = auto()
@@ -15,21 +32,83 @@ class ACar(Car):
         super().__init__(location=location, spec=spec, f=f, name=name)
         self.mode = mode
         if type(function) is str:
-            st = Symbol_Table({'t': 0.0, 'dt': 0.0}, add_constants=True)
-            expression = Expression(function, st)
-
-            def f(t: float, dt: float):
-                st.variables['t'] = t
-                st.variables['dt'] = dt
-                return expression()
-            self.function = f
+            self.expression = function
+            self.function = evaluator(function)
         else:
+            self.expression = None
             self.function = function
+        # Values of expression and trajectory on a time grid, see tabulate.
+        self._table = None
+        self._table_dt = None
+        self._trajectory = None
+
+    def tabulate(self, timeout: float, dt: float):
+        """Evaluate expression at once for all updates of a simulation with timeout and time step dt.
+        An accelerating car also integrates its trajectory alone, which it replays while on it
+        instead of integrating, see trajectory. Tables and trajectories are cached, so cars with
+        the same expression share them. Functions given as callables are not tabulated.
+        """
+        if self.expression is not None:
+            n = int(timeout / dt) + 2
+            self._table = tabulate(self.expression, dt, n)
+            self._table_dt = dt
+            if self.mode == ACar.Mode.ACCELERATION:
+                self._trajectory = trajectory(self.expression, self.spec, self.f, self.v, dt, n)
+
+    def value(self, t: float, dt: float) -> float:
+        """Value of function at time t, from the table when t is on its grid.
+        """
+        table = self._table
+        if table is not None and dt == self._table_dt:
+            i = round(t / dt)
+            if i < len(table) and i * dt == t:
+                return float(table[i])
+        return self.function(t, dt)
 
     def update(self, environment):
         if self.mode == ACar.Mode.MOVEMENT:
-            return Move(self.function(environment.time, environment.dt))
+            return Move(self.value(environment.time, environment.dt))
         elif self.mode == ACar.Mode.ACCELERATION:
-            return self.accelerate(self.function(environment.time, environment.dt), environment.dt)
+            i = self._on_trajectory(environment)
+            if i is not None:
+                self.v = float(self._trajectory.v[i + 1])
+                return Move(float(self._trajectory.dx[i]))
+            return self.accelerate_in(environment)
         else:
             raise RuntimeError(f"Unhandeled mode {self.mode.name}")
+
+    def throttle(self, environment) -> float | None:
+        if self.mode == ACar.Mode.ACCELERATION and self._on_trajectory(environment) is None:
+            return self.value(environment.time, environment.dt)
+        return None
+
+    def _on_trajectory(self, environment) -> int | None:
+        """Index of the update in trajectory, if the car is on it: the push of the update
+        was integrated from the same time, speed and time step with the same integrator.
+        """
+        trajectory = self._trajectory
+        if trajectory is None or environment.dt != self._table_dt or environment.integrator is not rk2a_motion:
+            return None
+        t, dt = environment.time, environment.dt
+        i = round(t / dt)
+        if i < len(trajectory.dx) and i * dt == t and self.v == trajectory.v[i]:
+            return i
+        return None
+
+
+@lru_cache(maxsize=256)
+def trajectory(expression: str, spec: specs.Characteristics, f: Friction, v0: float, dt: float, n: int) -> Trajectory:
+    """Trajectory of an ACar accelerating with expression from speed v0 for n updates with time step dt.
+    Pushes do not depend on position, so trajectories of cars at any locations are the same.
+    """
+    car = ACar(expression, spec=spec, f=f)
+    car.v = v0
+    table = tabulate(expression, dt, n)
+    dx, v = numpy.empty(n), numpy.empty(n + 1)
+    v[0] = v0
+    for i, u in enumerate(table.tolist()):
+        dx[i] = car.accelerate(u, dt).dx
+        v[i + 1] = car.v
+    dx.flags.writeable = False
+    v.flags.writeable = False
+    return Trajectory(dx=dx, v=v)
@@ -1,13 +1,16 @@
 from dataclasses import dataclass
-from eventloop.eventloop import AddListener, RemoveListener, Event, RemoveListener
+from functools import cache
+from typing import NamedTuple
+from eventloop.eventloop import Event, RemoveListener
 from simulation import Body
 from simulation.location import Location, Line
 from simulation import Environment
 from simulation.environment.events import Tick, Collision
 from simulation.moveable.events import Move
-from helpers import not_implemented, curry, Cached
-from simulation.math.rk2a import rk2a
+from helpers import not_implemented
+from simulation.math.rk2a import rk2a, rk2a_motion
 import autosim.car.specs as specs
+import numpy
 
 
 @dataclass
@@ -19,7 +22,99 @@ class Friction:
     SAND = 0.15
 
 
+class Constants(NamedTuple):
+    """Factors of the force acting on a car, which depend neither on throttle nor on speed.
+    A tuple, so constants of many cars convert into an array at once. Friction and brake are kept
+    as factors, not products, so force multiplies them in the same order as Car always did.
+    """
+    thrust: float
+    f: float
+    N: float
+    mbreak: float
+    drag: float
+    """Air drag coefficient, front_area * streamlining * AIR_DENSITY."""
+
+
+@cache
+def constants(spec: specs.Characteristics, f: float, air_density: float) -> Constants:
+    """Constants of cars with spec on a road with friction f, computed once per spec and friction."""
+    return Constants(thrust=spec.thrust, f=f, N=spec.mass * Car.g, mbreak=spec.mbreak,
+                     drag=spec.front_area * spec.streamlining * air_density)
+
+
+def force(d_pos, d_neg, thrust, f, N, mbreak, drag, v):
+    """Force acting on a car with positive and negative parts of throttle d_pos and d_neg at speed v.
+    Takes scalars or arrays.
+    """
+    # ref https://studref.com/596310/tehnika/sily_deystvuyuschie_avtomobil_pryamolineynom_dvizhenii
+    F_thrust = d_pos * thrust
+    F_frict = f * (1 + (v**2) / 1500) * N
+    F_break = d_neg * mbreak * N * f / Friction.ASPHALT
+    F_air = drag * (v**2)
+
+    return F_thrust - F_frict - F_break - F_air
+
+
+class Force:
+    """Force acting on a car with throttle u, depending on (t, x, v). Depends on speed only.
+    """
+    __slots__ = ('constants', 'd_pos', 'd_neg')
+
+    def __init__(self, car: 'Car', u: float):
+        self.constants = car.constants
+        self.d_pos = u if u > 0 else 0
+        self.d_neg = -u if u < 0 else 0
+
+    def __call__(self, t: float, x: float, v: float) -> float:
+        return force(self.d_pos, self.d_neg, *self.constants, v)
+
+    def quadratic(self) -> tuple[float, float]:
+        """Coefficients a, b of force = a - b * v**2, see simulation.math.integrators.exact.
+        """
+        c = self.constants
+        friction = c.f * c.N
+        return self.d_pos * c.thrust - friction - self.d_neg * c.mbreak * c.N * c.f / Friction.ASPHALT, friction / 1500 + c.drag
+
+
+def accelerate_many(u: numpy.ndarray, v: numpy.ndarray, mass: numpy.ndarray, thrust: numpy.ndarray, f: numpy.ndarray,
+                    N: numpy.ndarray, mbreak: numpy.ndarray, drag: numpy.ndarray, dt: float) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Car.accelerate of many cars at once: throttles u, speeds v, masses and constants are aligned arrays.
+    Same arithmetic as Force integrated by rk2a_motion, so the same result.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Distances and speeds after dt.
+    """
+    d_pos = numpy.where(u > 0, u, 0.0)
+    d_neg = numpy.where(u < 0, -u, 0.0)
+    k1v = dt * (force(d_pos, d_neg, thrust, f, N, mbreak, drag, v) / mass) / 2.0
+    w = v + k1v
+    x = 0.0 + dt * w
+    w = v + dt * (force(d_pos, d_neg, thrust, f, N, mbreak, drag, w) / mass)
+    return numpy.maximum(x, 0.0), numpy.maximum(w, 0.0)
+
+
+def accelerate_cars(environment: Environment):
+    """Integrate pushes of all cars in environment, which throttle depends only on time, see Car.throttle,
+    in one accelerate_many call. Each car picks up its push, when it handles the tick, see Car.accelerate_in.
+    """
+    cars, rows = [], []
+    for body in environment.bodies:
+        if isinstance(body, Car):
+            throttle = body.throttle(environment)
+            if throttle is not None:
+                cars.append(body)
+                rows.append((throttle, body.v, body.mass) + body.constants)
+    if not cars:
+        return
+
+    dx, v = accelerate_many(*numpy.array(rows, dtype=float).T, environment.dt)
+    key = environment, environment.time
+    for car, car_dx, car_v in zip(cars, dx.tolist(), v.tolist()):
+        car._pushed = key, car_dx, car_v
+
+
 class Car(Body):
+    __slots__ = ('spec', 'f', 'N', 'constants', '_pushed')
 
     AIR_DENSITY = 1.25
     g = 9.8
@@ -33,12 +128,13 @@ class Car(Body):
         self.f = f
 
         self.N = spec.mass * Car.g
+        self.constants = constants(spec, f, self.AIR_DENSITY)
         self.v = 0
-
-        self._next = Cached[Body]()
+        # Push integrated by accelerate_cars: (environment, time), distance and speed.
+        self._pushed = None
 
     def input_events(self) -> set:
-        return [Tick, Collision, AddListener, RemoveListener]
+        return [Tick, Collision]
 
     def accept(self, event: Event) -> list[Event]:
 
@@ -47,33 +143,44 @@ class Car(Body):
 
         if isinstance(event, Collision) and event.collider is self:
             return self.on_collision(event)
-        
-        if isinstance(event, AddListener) and isinstance(event.listener, Body):
-            self._next.unset()
-        
-        if isinstance(event, RemoveListener) and isinstance(event.listener, Body):
-            self._next.unset()
-
-    def get_force(self, u: float):
-        d_pos = u if u > 0 else 0
-        d_neg = -u if u < 0 else 0
-
-        def force(t, x, v):
-            # ref https://studref.com/596310/tehnika/sily_deystvuyuschie_avtomobil_pryamolineynom_dvizhenii
-            F_thrust = d_pos * self.spec.thrust
-            F_frict = self.f * (1 + (v**2) / 1500) * self.N
-            F_break = d_neg * self.spec.mbreak * self.N * self.f / Friction.ASPHALT
-            F_air = self.spec.front_area * self.spec.streamlining * self.AIR_DENSITY * (v**2)
-            
-            result = F_thrust - F_frict - F_break - F_air
-            
-            return result
-
-        return force
+
+    def get_force(self, u: float) -> 'Force':
+        return Force(self, u)
         
     def accelerate(self, u: float, dt: float) -> Move:
         return self.push(dt, self.get_force(u))
 
+    def throttle(self, environment: Environment) -> float | None:
+        """Throttle of the next push, if it depends only on time, not on other bodies. Pushes of such cars
+        are integrated together, see accelerate_cars. None if the car is not pushed by a throttle like that.
+        """
+        return None
+
+    def accelerate_in(self, environment: Environment) -> Move:
+        """Same as accelerate with throttle, but pushes of all cars of environment are integrated
+        at once by the first car handling the tick. Integrators other than rk2 push each car alone.
+        """
+        key = environment, environment.time
+        pushed = self._pushed
+        if pushed is None or pushed[0] != key:
+            if environment.integrator is not rk2a_motion:
+                return self.accelerate(self.throttle(environment), environment.dt)
+            accelerate_cars(environment)
+            pushed = self._pushed
+            if pushed is None or pushed[0] != key:
+                # Not one of bodies of environment.
+                return self.accelerate(self.throttle(environment), environment.dt)
+
+        self._pushed = None
+        _, dx, v = pushed
+        self.v = v
+        return Move(dx)
+
+    def restore(self, state):
+        # Pushes integrated before restore may be of the same time.
+        self._pushed = None
+        super().restore(state)
+
     @not_implemented
     def update(self, environment: Environment) -> Event:
         pass
@@ -81,5 +188,3 @@ class Car(Body):
     def on_collision(self, collision: Collision):
         return RemoveListener(self)
 
-    def next(self, environment) -> Body:
-        return self._next.get(curry(super().next, environment))
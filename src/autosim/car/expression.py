@@ -0,0 +1,115 @@
+from cexprtk import Expression, Symbol_Table
+from functools import lru_cache, reduce
+from typing import Callable
+import ast
+import numpy
+
+# Expressions are functions of time and time step, see ACar.
+VARIABLES = 't', 'dt'
+
+_FUNCTIONS = {
+    'abs': numpy.abs,
+    'sin': numpy.sin,
+    'cos': numpy.cos,
+    'tan': numpy.tan,
+    'exp': numpy.exp,
+    'log': numpy.log,
+    'sqrt': numpy.sqrt,
+    'floor': numpy.floor,
+    'ceil': numpy.ceil,
+    'pow': numpy.power,
+    'min': lambda *args: reduce(numpy.minimum, args),
+    'max': lambda *args: reduce(numpy.maximum, args),
+}
+
+_CONSTANTS = {
+    'pi': numpy.pi,
+    'inf': numpy.inf,
+}
+
+_OPERATORS = {
+    ast.Add: None,
+    ast.Sub: None,
+    ast.Mult: None,
+    ast.Div: None,
+    # As in exprtk: sign of the dividend, nan instead of complex numbers.
+    ast.Mod: 'fmod',
+    ast.Pow: 'pow',
+}
+
+
+def evaluator(expression: str) -> Callable[[float, float], float]:
+    """Function of (t, dt) evaluating expression by cexprtk, one call per value."""
+    st = Symbol_Table({'t': 0.0, 'dt': 0.0}, add_constants=True)
+    compiled = Expression(expression, st)
+
+    def f(t: float, dt: float):
+        st.variables['t'] = t
+        st.variables['dt'] = dt
+        return compiled()
+    return f
+
+
+def vectorize(expression: str) -> Callable[[numpy.ndarray, float], numpy.ndarray] | None:
+    """Function of array t and scalar dt evaluating expression with NumPy in one pass.
+    Arithmetic, functions and constants above are supported. None for any other syntax,
+    which is left to cexprtk, see evaluator.
+    """
+    try:
+        tree = ast.parse(expression.replace('^', '**').lower(), mode='eval')
+    except SyntaxError:
+        return None
+
+    def translate(node: ast.AST) -> ast.AST | None:
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return ast.Call(ast.Name('number', ast.Load()), [ast.Constant(float(node.value))], [])
+        if isinstance(node, ast.Name):
+            if node.id in VARIABLES or node.id in _CONSTANTS:
+                return ast.Name(node.id, ast.Load())
+            return None
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+            operand = translate(node.operand)
+            return None if operand is None else ast.UnaryOp(node.op, operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            left, right = translate(node.left), translate(node.right)
+            if left is None or right is None:
+                return None
+            function = _OPERATORS[type(node.op)]
+            if function is None:
+                return ast.BinOp(left, node.op, right)
+            return ast.Call(ast.Name(function, ast.Load()), [left, right], [])
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS and not node.keywords:
+            args = [translate(arg) for arg in node.args]
+            if not args or any(arg is None for arg in args):
+                return None
+            return ast.Call(ast.Name(node.func.id, ast.Load()), args, [])
+        return None
+
+    body = translate(tree.body)
+    if body is None:
+        return None
+    code = compile(ast.fix_missing_locations(ast.Expression(body)), f"<{expression}>", 'eval')
+    namespace = {'__builtins__': {}, 'number': numpy.float64, 'fmod': numpy.fmod, **_FUNCTIONS, **_CONSTANTS}
+
+    def f(t: numpy.ndarray, dt: float) -> numpy.ndarray:
+        # All operands are NumPy values, so division by zero gives inf, as in exprtk.
+        values = eval(code, namespace, {'t': numpy.asarray(t, dtype=float), 'dt': numpy.float64(dt)})
+        return numpy.broadcast_to(values, numpy.shape(t))
+    return f
+
+
+@lru_cache(maxsize=256)
+def tabulate(expression: str, dt: float, n: int) -> numpy.ndarray:
+    """Values of expression at t = i * dt for i < n, the times of updates of an environment.
+    Tables are cached by expression and grid. They are read-only and shared by all callers.
+    """
+    t = numpy.arange(n) * dt
+    f = vectorize(expression)
+    if f is None:
+        f = evaluator(expression)
+        values = numpy.fromiter((f(time, dt) for time in t.tolist()), float, n)
+    else:
+        with numpy.errstate(all='ignore'):
+            values = numpy.array(f(t, dt), dtype=float)
+    values.flags.writeable = False
+    return values
@@ -29,6 +29,7 @@ class NetworkArchitecture(nn.NetworkArchitecture):
 NeuralNetwork = nn.NeuralNetwork
 
 class NCar(Car):
+    __slots__ = ('network', 'u')
 
     def __init__(self, network: NeuralNetwork, location: Location = Line(0), spec: specs.Characteristics = specs.TEST, f: Friction = Friction.ASPHALT, name: str = None):
         super().__init__(location=location, spec=spec, f=f, name=name)
@@ -49,3 +50,13 @@ class NCar(Car):
         u = bound(decision * 2 - 1, -1, 1)
         self.u = u
         return self.accelerate(u, environment.dt)
+
+    def snapshot(self):
+        return super().snapshot(), self.u
+
+    def restore(self, state):
+        body, self.u = state
+        super().restore(body)
+
+    def move_state(self) -> dict:
+        return {'v': self.v, 'u': self.u}
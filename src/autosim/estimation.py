@@ -2,7 +2,6 @@
 import autosim.car
 import autosim.simulation
 import eventloop
-import helpers
 import simulation.environment.events
 import simulation.location
 
@@ -58,7 +57,14 @@ class EstimatorObject(eventloop.Listener):
         self.target = target
         self.first = True
         self.fine = 0
-    
+        self.dt = None
+
+    def snapshot(self):
+        return self.first, self.fine, self.dt
+
+    def restore(self, state):
+        self.first, self.fine, self.dt = state
+
     def input_events(self):
         return Tick, Collision
 
@@ -94,17 +100,13 @@ class EstimatorObject(eventloop.Listener):
         return fine
 
     def front(self, env: simulation.Environment) -> simulation.Body:
-        # TODO: optimize. Can remember front and then recalc on add/remove listener.
-        # consider implementation in Body class to use inside both estimation and decision.
-
-        target_index = helpers.index_if(env.bodies, lambda body: body is self.target)
+        # Wrapped on a line as well: the front of the leading car is the last one, not None.
+        target_index = env.index_of(self.target)
         if target_index is None:
             return None
 
-        front_index = (target_index + 1) % len(env.bodies)
-        front = env.bodies[front_index]
-
+        front = env.bodies[(target_index + 1) % len(env.bodies)]
         if front is self.target:
             return None
-        
+
         return front
@@ -1,6 +1,7 @@
 
+import copy
 from dataclasses import dataclass, field
-from autosim.car import Car
+from autosim.car import ACar, Car
 from helpers import not_implemented
 import eventloop
 import eventloop.events
@@ -11,7 +12,18 @@ class SimulationParameters:
     timeout: float
     objects: list[eventloop.Listener] = field(default_factory=list)
     dt: float = simulation.Environment.DEFAULT_DT
-    driver: simulation.Driver = simulation.Driver(simulation.Driver.Type.FAST)
+    driver: simulation.Driver = None
+    """Source of updates, a FAST driver of each environment by default."""
+    stats: bool = False
+    """Collect event loop statistics, see EventLoop.stats()."""
+    tracer: eventloop.Tracer = None
+    """Receiver of event loop trace, see eventloop.tracing."""
+    arrays: bool = False
+    """Keep bodies' state in arrays, see simulation.state."""
+    replay: eventloop.JournalPlayer = None
+    """Re-drive objects from a journal instead of simulating senders of journaled events, see eventloop.journal."""
+    integrator: str = 'rk2'
+    """Integrator of pushes of bodies, see simulation.math.integrators."""
 
 class Simulation:
 
@@ -19,13 +31,50 @@ class Simulation:
         self.parameters = parameters
     
     def simulate(self):
+        environment = self.environment()
+        environment.simulate()
+        return environment
+
+    def environment(self) -> simulation.Environment:
+        """Environment ready to simulate: the terminator and objects are put to subscribe.
+        """
         p = self.parameters
 
-        environment = simulation.Environment(dt=p.dt, driver=p.driver)
+        environment = simulation.Environment(dt=p.dt, driver=p.driver, tracer=p.tracer, arrays=p.arrays, integrator=p.integrator)
+        environment.loop.enable_stats(p.stats)
+        if p.replay is not None:
+            environment.loop.replay(p.replay)
         terminator = simulation.Timer(environment=environment, timeout=p.timeout, event=eventloop.events.Terminate, kwargs={'immediate': False})
         terminator.start()
-        
-        environment.subscribe(terminator, *p.objects)
-        environment.simulate()
-        
+
+        for object in p.objects:
+            if isinstance(object, ACar):
+                object.tabulate(p.timeout, p.dt)
+        environment.add_many([terminator, *p.objects])
         return environment
+
+
+class Fork:
+    """Simulation prepared once and restored from its snapshot for each branch, see Environment.snapshot.
+    Parameters are copied, so their objects are not affected.
+    """
+
+    def __init__(self, parameters: SimulationParameters, warmup: float = 0):
+        """Fork constructor.
+
+        Args:
+            parameters (SimulationParameters): Common part of simulations.
+            warmup (float): Seconds to simulate objects of parameters alone before the fork point.
+        """
+        self.environment = Simulation(copy.deepcopy(parameters)).environment()
+        for _ in range(round(warmup / self.environment.dt)):
+            self.environment.iterate()
+        self._snapshot = self.environment.snapshot()
+
+    def simulate(self, *objects: eventloop.Listener) -> simulation.Environment:
+        """Restore the environment, add objects and simulate.
+        """
+        self.environment.restore(self._snapshot)
+        self.environment.subscribe(*objects)
+        self.environment.simulate()
+        return self.environment
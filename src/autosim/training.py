@@ -2,6 +2,7 @@ import copy
 from dataclasses import dataclass, field
 from enum import Enum
 import sys
+import threading
 from typing import Any
 
 import numpy as np
@@ -9,7 +10,7 @@ import numpy as np
 from autosim.car.ncar import NetworkArchitecture, NeuralNetwork, NCar, Friction
 from autosim.car.specs import Characteristics, TEST
 from autosim.estimation import EstimationStrategy
-from autosim.simulation import SimulationParameters
+from autosim.simulation import Fork, SimulationParameters
 from helpers import Serializable
 import autosim
 import pygad.pygad.gann
@@ -104,6 +105,9 @@ class GeneticAlgorithmParameters:
 class TrainingSuite:
    estimation: EstimationStrategy
    simulation: SimulationParameters
+   warmup: float = 0
+   """Seconds to simulate objects of the suite alone before the trained car is added. Simulated once, see Fork.
+   """
 
 def to_fine(fitness):
    return 1 / fitness if fitness > 0 else sys.float_info.max
@@ -163,14 +167,19 @@ class TrainingContext:
 
 
 def make_fitness(context: TrainingContext):
+   # Suites are prepared once per thread, each evaluation restores them instead of copying.
+   local = threading.local()
+
    def fitness(ga_instance, solution, index):
       nonlocal context
       strategy = context.strategy
+      if not hasattr(local, 'forks'):
+         local.forks = [Fork(suite.simulation, warmup=suite.warmup) for suite in strategy.suites]
       network = NeuralNetwork.from_vector(context.architecture, solution)
       fitnesses = []
-      for suite in strategy.suites:
+      for suite, fork in zip(strategy.suites, local.forks):
          car = NCar(network=network, location=Line(0), spec=strategy.spec, f=strategy.friction)
-         fitnesses += [autosim.fitness(car, simulation_parameters=suite.simulation, strategy=suite.estimation)]
+         fitnesses += [autosim.fork_fitness(car, fork=fork, strategy=suite.estimation)]
       return strategy.aggregation(fitnesses)
    return fitness
 
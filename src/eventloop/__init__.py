@@ -1,2 +1,5 @@
 
 from eventloop.eventloop import Event, Listener, CallbackListener, EventLoop
+from eventloop.stats import EventLoopStats, ListenerStats
+from eventloop.tracing import Tracer, LoggingTracer, JsonlTracer, TeeTracer
+from eventloop.journal import JournalWriter, Journal, JournalPlayer
@@ -1,19 +1,35 @@
-from helpers import remove_by_identity, to_array, to_iterable
+from helpers import to_array, to_iterable
+import asyncio
+import copy
 import logging
+from collections import deque
+from dataclasses import dataclass
 from enum import Enum, auto
+from itertools import count
+from time import perf_counter
 from typing import Callable
 
+from eventloop.stats import EventLoopStats, ListenerStats
+from eventloop.journal import JournalPlayer
+from eventloop.tracing import Tracer, LoggingTracer
 from helpers.identityset import IdentitySet
 
 
 class Event:
+    # Events are created per object per iteration, so events are slotted.
+    # Subclasses without __slots__ keep dynamic attributes.
+    __slots__ = ('sender',)
+
     def __init__(self, sender=None):
         self.sender = sender
 
 
 class Listener:
+    __slots__ = ()
+
     def input_events(self) -> set[type(Event)]:
-        """List of events accepted by listner. None is a wildcard for any event.
+        """List of events accepted by listner. Subclasses of listed events are accepted as well.
+        None is a wildcard for any event.
 
         Returns:
             list[Event]: List of accepted events or None.
@@ -31,10 +47,57 @@ class Listener:
         """
         return None
 
+    def batch_events(self) -> set[type(Event)]:
+        """Subset of input events delivered through accept_batch instead of accept.
+        Events of such type are collected during a wave and delivered at its end.
+
+        Returns:
+            list[Event]: List of batched events or None.
+        """
+        return None
+
+    def accept_batch(self, events: list[Event]) -> list[Event]:
+        """Accept all events of one type handled during a wave and return produced events.
+
+        Args:
+            events (list[Event]): Events of the same type in order of handling.
+
+        Returns:
+            list[Event]: Events produced while handling these events.
+        """
+        product = []
+        for event in events:
+            product += to_array(self.accept(event))
+        return product
+
+    def replayed(self, events: list[Event], state: dict = None):
+        """Called instead of accept during journal replay with journaled events the listener produced,
+        see eventloop.journal. Lets listener restore its state.
+
+        Args:
+            events (list[Event]): Produced events.
+            state (dict, optional): State of the listener recorded with the response, see JournalWriter.
+        """
+        pass
+
+    def snapshot(self):
+        """State of the listener, which restore can bring back, see EventLoop.snapshot.
+        Must be cheap: immutable values or copies of mutable ones. Stateless listeners return None.
+        """
+        return None
+
+    def restore(self, state):
+        """Bring back state taken by snapshot. Same state may be restored many times.
+        """
+        pass
+
 class CallbackListener(Listener):
-    def __init__(self, accept_callback: Callable[[Event], list[Event]], input_events: set[type(Event)]):
+    def __init__(self, accept_callback: Callable[[Event], list[Event]], input_events: set[type(Event)],
+                 accept_batch_callback: Callable[[list[Event]], list[Event]] = None, batch_events: set[type(Event)] = None):
         self.accept_callback = accept_callback
         self._input_events = input_events
+        self.accept_batch_callback = accept_batch_callback
+        self._batch_events = batch_events
         
     def input_events(self) -> set:
         return self._input_events
@@ -42,15 +105,24 @@ class CallbackListener(Listener):
     def accept(self, event: Event) -> list[Event]:
         return self.accept_callback(event)
 
+    def batch_events(self) -> set:
+        return self._batch_events
+
+    def accept_batch(self, events: list[Event]) -> list[Event]:
+        if self.accept_batch_callback is None:
+            return super().accept_batch(events)
+        return self.accept_batch_callback(events)
+
 class Iteration(Event):
     """Service event, produced each loop iteration. Cannot be created by any objects but Event Loop.
     """
-    pass
+    __slots__ = ()
 
 
 class AddListener(Event):
     """Service event, needed to create new listneres by current listeners.
     """
+    __slots__ = ('listener',)
 
     def __init__(self, listener: Listener):
         self.listener = listener
@@ -59,6 +131,7 @@ class AddListener(Event):
 class RemoveListener(Event):
     """Service event, needed to create new listneres by current listeners.
     """
+    __slots__ = ('listener',)
 
     def __init__(self, listener: Listener):
         self.listener = listener
@@ -67,6 +140,7 @@ class RemoveListener(Event):
 class Terminate(Event):
     """Terminate Event Loop.
     """
+    __slots__ = ('immediate',)
 
     def __init__(self, immediate: bool):
         """Terminate event constructor.
@@ -78,33 +152,99 @@ class Terminate(Event):
         self.immediate = immediate
 
 
+class _BatchCollector(Listener):
+    """Dispatch entry standing for a listener which accepts events of one type in batches.
+    Kept for the listener and the type as long as the listener is subscribed, so recompiled
+    dispatch tuples collect into the same batch.
+    """
+
+    def __init__(self, listener: Listener, pending: list['_BatchCollector']):
+        self.listener = listener
+        self.events = []
+        self._pending = pending
+
+    def accept(self, event: Event) -> list[Event]:
+        if not self.events:
+            self._pending.append(self)
+        self.events.append(event)
+
+
 class EventLoop(Listener):
 
     ListenersSet = IdentitySet[Listener]
     ListenersQueue = list[Listener]
+    # Identity-keyed, ordered by subscription.
+    ListenersIndex = dict[int, Listener]
     EventsQueue = list[Event]
-    EventsMap = dict[type(Event), ListenersQueue]
+    EventsDeque = deque[Event]
+    EventsMap = dict[type(Event), ListenersIndex]
+    DispatchTable = dict[type(Event), tuple[Listener, ...]]
 
     class _ListnerAction(Enum):
         ADD = auto()
         REMOVE = auto()
 
-    def __init__(self):
+    @dataclass
+    class Snapshot:
+        """State of an event loop between iterations, see EventLoop.snapshot.
+        """
+        listeners: list[Listener]
+        """Subscribed listeners in order of subscription, except the loop itself."""
+        pending: list[Listener]
+        """Listeners of AddListener events in the queue."""
+        states: list
+        """States of listeners, then of pending listeners."""
+        queue: list[Event]
+        iterations: int
+        terminate: bool
+        terminate_immediate: bool
+
+    def __init__(self, stats: bool = False, tracer: Tracer = None):
+        """Event Loop constructor.
+
+        Args:
+            stats (bool): Collect statistics, see stats().
+            tracer (Tracer): Receiver of trace records. If not set, trace is written into log
+            when debug level is enabled at construction.
+        """
         self._listners = EventLoop.ListenersSet()
         self._listners_actions = []
-        self._queue = EventLoop.EventsQueue()
+        self._queue = EventLoop.EventsDeque()
+        # Events injected from other threads or coroutines, handled in the next iteration.
+        self._inbox = EventLoop.EventsDeque()
+        self._iteration = Iteration(self)
         self._map = EventLoop.EventsMap()
+        self._dispatch = EventLoop.DispatchTable()
+        self._wildcards = EventLoop.ListenersIndex()
+        # Reverse index: listener identity to its input events (None for wildcard).
+        self._inputs = dict[int, frozenset[type(Event)] | None]()
+        self._order = dict[int, int]()
+        self._sequence = count()
+        self._batch_inputs = dict[int, tuple[type(Event), ...]]()
+        # Listener identity to its collectors by event type.
+        self._collectors = dict[int, dict[type(Event), _BatchCollector]]()
+        self._batches = list[_BatchCollector]()
+        self._removals = 0
+        self._iterations = 0
 
         self._terminate_flag = False
         self._terminate_immediate_flag = False
 
+        # Instrumentation is checked once per iteration.
+        if tracer is None and logging.getLogger().isEnabledFor(logging.DEBUG):
+            tracer = LoggingTracer()
+        self._tracing = tracer is not None
+        self._tracer = tracer if self._tracing else Tracer()
+        self._player = None
+        self._stats = None
+        self.enable_stats(stats)
+
         self.subscribe(self)
 
     def input_events(self) -> set[type(Event)]:
         return {Terminate, AddListener, RemoveListener}
 
     def accept(self, event: Event) -> list[Event]:
-        logging.debug("rcv %s", event)
         if isinstance(event, AddListener):
             self._listners_actions.append(
                 (event.listener, EventLoop._ListnerAction.ADD))
@@ -120,97 +260,456 @@ class EventLoop(Listener):
             self._terminate_immediate_flag = self._terminate_immediate_flag or event.immediate
 
     def subscribe(self, listener: Listener) -> bool:
-        logging.debug("subscribe %s...", listener)
-        for l in self._listners:
-            if l is listener:
-                raise RuntimeError(f"{listener} is already subscribed!")
+        self.subscribe_many((listener,))
+        return True
 
-        input_events = set(to_iterable(listener.input_events()))
-        if len(input_events) == 0:
-            logging.warning("%s has no iput events!", listener)
+    def subscribe_many(self, listeners: list[Listener]):
+        """Subscribe listeners in order. Dispatch is invalidated once for all of them.
+        If any listener is already subscribed, none of them is.
+        """
+        keys = set()
+        for listener in listeners:
+            key = id(listener)
+            if key in self._inputs or key in keys:
+                raise RuntimeError(f"{listener} is already subscribed!")
+            keys.add(key)
+
+        invalidated = set()
+        wildcard = False
+        for listener in listeners:
+            input_events = self._register(listener)
+            if input_events is None:
+                wildcard = True
+            else:
+                invalidated |= input_events
 
-        self._listners.add(listener)
-        for evt in input_events:
-            self._map.setdefault(
-                evt, EventLoop.ListenersQueue()).append(listener)
-        logging.debug("subscribed to events %s", input_events)
-        return True
+        if wildcard:
+            self._dispatch.clear()
+        else:
+            self._invalidate_dispatch(invalidated)
 
     def unsubscribe(self, listener: Listener):
-        if listener not in self._listners:
-            return
+        self.unsubscribe_many((listener,))
+
+    def unsubscribe_many(self, listeners: list[Listener]):
+        """Unsubscribe listeners. Not subscribed ones are ignored. Dispatch is invalidated once for all of them.
+        """
+        invalidated = set()
+        wildcard = False
+        for listener in listeners:
+            key = id(listener)
+            if key not in self._inputs:
+                continue
+            input_events = self._unregister(key, listener)
+            if input_events is None:
+                wildcard = True
+            else:
+                invalidated |= input_events
+
+        if wildcard:
+            self._dispatch.clear()
+        else:
+            self._invalidate_dispatch(invalidated)
+
+    def _register(self, listener: Listener) -> frozenset[type(Event)] | None:
+        key = id(listener)
+        input_events = listener.input_events()
+        if input_events is not None:
+            input_events = frozenset(to_iterable(input_events))
+            if len(input_events) == 0:
+                logging.warning("%s has no iput events!", listener)
+
+        self._listners.add(listener)
+        self._inputs[key] = input_events
+        self._order[key] = next(self._sequence)
+
+        # Muted listeners respond to each event separately.
+        muted = self._player is not None and self._player.is_muted(listener)
+        batch_events = () if muted else tuple(to_iterable(listener.batch_events()))
+        if batch_events:
+            self._batch_inputs[key] = batch_events
+
+        if input_events is None:
+            self._wildcards[key] = listener
+        else:
+            for evt in input_events:
+                self._map.setdefault(evt, EventLoop.ListenersIndex())[key] = listener
+
+        self._tracer.subscribe(listener, input_events)
+        return input_events
+
+    def _unregister(self, key: int, listener: Listener) -> frozenset[type(Event)] | None:
+        input_events = self._inputs.pop(key)
         self._listners.remove(listener)
-        for ls in self._map.values():
-            remove_by_identity(ls, listener)
+        del self._order[key]
+        self._batch_inputs.pop(key, None)
+        self._collectors.pop(key, None)
+        self._removals += 1
+
+        if input_events is None:
+            del self._wildcards[key]
+        else:
+            for evt in input_events:
+                listeners = self._map[evt]
+                del listeners[key]
+                if not listeners:
+                    del self._map[evt]
+
+        self._tracer.unsubscribe(listener)
+        return input_events
+
+    def snapshot(self) -> 'EventLoop.Snapshot':
+        """Capture subscriptions, states of subscribed and pending listeners and the queue.
+        Call between iterations. Events are not copied, they are not mutated after production.
+        Events injected from other threads are not captured.
+        """
+        listeners = [l for l in self._listners if l is not self]
+        pending = [event.listener for event in self._queue if isinstance(event, AddListener)]
+        return EventLoop.Snapshot(listeners=listeners, pending=pending,
+                                  states=[l.snapshot() for l in listeners] + [l.snapshot() for l in pending],
+                                  queue=list(self._queue), iterations=self._iterations,
+                                  terminate=self._terminate_flag, terminate_immediate=self._terminate_immediate_flag)
+
+    def restore(self, snapshot: 'EventLoop.Snapshot'):
+        """Bring back the loop to the snapshot. Listeners subscribed since the snapshot are unsubscribed,
+        unsubscribed ones are subscribed again in the original order. Call between iterations.
+        """
+        current = [l for l in self._listners if l is not self]
+        kept = 0
+        for l, expected in zip(current, snapshot.listeners):
+            if l is not expected:
+                break
+            kept += 1
+        # Dispatch follows subscription order, so everything after the first difference is resubscribed.
+        self.unsubscribe_many(current[kept:])
+        self.subscribe_many(snapshot.listeners[kept:])
+
+        for l, state in zip(snapshot.listeners + snapshot.pending, snapshot.states):
+            l.restore(state)
+
+        self._queue.clear()
+        self._queue.extend(snapshot.queue)
+        self._listners_actions.clear()
+        self._iterations = snapshot.iterations
+        self._terminate_flag = snapshot.terminate
+        self._terminate_immediate_flag = snapshot.terminate_immediate
+
+    def enable_stats(self, enabled: bool = True):
+        """Enable or disable statistics collection. Collected statistics are kept when disabled.
+        """
+        if enabled and self._stats is None:
+            self._stats = EventLoopStats()
+        self._collect_stats = enabled
+        self._instrumented = self._collect_stats or self._tracing or self._player is not None
+
+    def replay(self, player: JournalPlayer):
+        """Re-drive listeners from a journal, see eventloop.journal. Senders of journaled events
+        respond with journaled events instead of accepting events, so must be subscribed after this call.
+        """
+        self._player = player
+        self.enable_stats(self._collect_stats)
+
+    def stats(self) -> EventLoopStats:
+        """Return copy of statistics collected so far.
+        """
+        return copy.deepcopy(self._stats) if self._stats is not None else EventLoopStats()
+
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats = EventLoopStats()
 
     def put(self, event: Event):
         """Put event into queue. May use for environment preparation before run.
+        If called while handling events, the event is handled in the next wave.
         """
         if not hasattr(event, 'sender'):
             event.sender = None
         self._queue.append(event)
 
+    def inject(self, event: Event):
+        """Thread-safe put. The event is handled in the first wave of the next iteration.
+        """
+        if not hasattr(event, 'sender'):
+            event.sender = None
+        self._inbox.append(event)
+
     def loop(self):
         while self.iterate():
             pass
 
+    async def loop_async(self, yield_every: int = 1):
+        """Run loop as a coroutine, yielding control to asyncio loop every yield_every iterations.
+        """
+        if yield_every < 1:
+            raise ValueError(f"Expected yield_every >= 1 (yield_every = {yield_every})")
+        while True:
+            for _ in range(yield_every):
+                if not self.iterate():
+                    return
+            await asyncio.sleep(0)
+
     def iterate(self):
         """Make a single Event Loop interation.
         """
-        logging.debug('= = = ITERATION START = = =')
-        self._queue = EventLoop.EventsQueue([Iteration(self)]) + self._queue
-        while not self._terminate_immediate_flag and len(self._queue) > 0:
-            self._queue = self._handle_events()
+        self._iterations += 1
+        queue = self._queue
+        queue.appendleft(self._iteration)
+        if self._inbox:
+            self._drain_inbox()
+        if self._instrumented:
+            self._iterate_instrumented()
+        else:
+            while not self._terminate_immediate_flag and queue:
+                self._handle_events()
         self._handle_listeners_actions()
-        logging.debug('= = =  ITERATION END  = = =')
         return not self._terminate_flag
 
-    def _handle_events(self) -> EventsQueue:
-        """Handle available events in the queue. Return queue with new events.
+    def _drain_inbox(self):
+        inbox = self._inbox
+        # Other threads may keep appending, take only what is there now.
+        for _ in range(len(inbox)):
+            self._queue.append(inbox.popleft())
+
+    def _handle_events(self):
+        """Handle one wave: events available in the queue. New events are appended to the same queue
+        and are handled by the next wave.
         """
-        new_events = EventLoop.EventsQueue()
-        for e in self._queue:
+        queue = self._queue
+        removals = self._removals
+        wave = len(queue)
+        while wave > 0:
+            wave -= 1
+            e = queue.popleft()
             if e.sender is not None and e.sender not in self._listners:
                 continue
 
-            new_events += self._handle_event(e)
+            self._handle_event(e, queue)
             if self._terminate_immediate_flag:
+                # Drop the rest of the wave, keep events produced so far.
+                for _ in range(wave):
+                    queue.popleft()
                 break
-        return new_events
 
-    def _handle_event(self, event) -> EventsQueue:
-        """Handle one event. Return produced events.
-        """
-        new_events = EventLoop.EventsQueue()
-        listeners = self._map.setdefault(type(event), [])
+        if self._batches:
+            self._flush_batches(queue, removals != self._removals)
 
-        logging.debug("handle event %s", event)
+    def _handle_event(self, event, new_events: EventsDeque):
+        """Handle one event. Append produced events to new_events.
+        """
+        listeners = self._dispatch.get(type(event))
+        if listeners is None:
+            listeners = self._compile_dispatch(type(event))
 
-        if len(listeners) == 0:
+        if not listeners:
             logging.warning("Unhandeled event %s", type(event))
+            return
 
         # For each listner which accepts this event
-        for l in listeners:
+        try:
+            for l in listeners:
+                evs = l.accept(event)
+                if evs is None:
+                    pass
+                elif isinstance(evs, Event):
+                    evs.sender = l
+                    new_events.append(evs)
+                else:
+                    for ev in to_iterable(evs):
+                        if isinstance(ev, type):
+                            ev = ev()
+                        ev.sender = l
+                        new_events.append(ev)
+
+                if self._terminate_immediate_flag:
+                    break
+        except Exception as exception:
+            raise RuntimeError(f"Exception during processing of event {event} by listener {l}") from exception
+
+    def _flush_batches(self, new_events: EventsDeque, removed: bool, wave: int = 0, stats: EventLoopStats = None, tracer: Tracer = None):
+        """Deliver events collected during the wave to batch listeners. Append produced events to new_events.
+        Senders of events are checked when events are handled, so events are delivered, if their senders
+        were unsubscribed later in the wave, as to other listeners. Listeners unsubscribed during the wave
+        receive nothing.
+        """
+        batches = tuple(self._batches)
+        self._batches.clear()
+        for batch in batches:
+            events = batch.events
+            batch.events = []
+            l = batch.listener
+            if removed and l not in self._listners:
+                continue
+
+            if tracer is not None:
+                tracer.batch(wave, type(events[0]), events)
             try:
-                evs = to_iterable(l.accept(event))
+                if stats is None:
+                    evs = l.accept_batch(events)
+                else:
+                    start = perf_counter()
+                    evs = l.accept_batch(events)
+                    self._count_listener(stats, l, perf_counter() - start)
             except Exception as exception:
-                raise RuntimeError(f"Exception during processing of event {event} by listener {l}") from exception
+                raise RuntimeError(f"Exception during processing of {len(events)} events {type(events[0])} by listener {l}") from exception
+
+            products = self._products(l, evs)
+            new_events.extend(products)
+            if tracer is not None and products:
+                tracer.response(l, products)
 
-            logging.debug("\t%s responded with %s", l, evs)
-            for ev in evs:
-                if isinstance(ev, type):
-                    ev = ev()
-                ev.sender = l
-                new_events.append(ev)
+    def _products(self, listener: Listener, evs) -> EventsQueue:
+        """Normalize listener response into list of events sent by the listener.
+        """
+        products = EventLoop.EventsQueue()
+        for ev in to_iterable(evs):
+            if isinstance(ev, type):
+                ev = ev()
+            ev.sender = listener
+            products.append(ev)
+        return products
+
+    def _iterate_instrumented(self):
+        """Same as iteration body, but collects statistics and writes trace.
+        """
+        stats = self._stats if self._collect_stats else None
+        tracer = self._tracer if self._tracing else None
+        queue = self._queue
+
+        if tracer is not None:
+            tracer.iteration(self._iterations)
+
+        player = self._player
+        if player is not None:
+            player.iteration(self._iterations)
+
+        produced = 0
+        wave = 0
+        while not self._terminate_immediate_flag and queue:
+            if player is not None:
+                player.wave(wave)
+            self._handle_events_instrumented(wave, stats, tracer)
+            if stats is not None:
+                if wave == len(stats.wave_production):
+                    stats.wave_production.append(0)
+                stats.wave_production[wave] += len(queue)
+                produced += len(queue)
+            wave += 1
+
+        if stats is not None:
+            stats.iterations += 1
+            stats.waves += wave
+            stats.iteration_production_max = max(stats.iteration_production_max, produced)
+
+    def _handle_events_instrumented(self, wave: int, stats: EventLoopStats, tracer: Tracer):
+        """Same as _handle_events, but collects statistics and writes trace.
+        """
+        queue = self._queue
+        removals = self._removals
+        remaining = len(queue)
+        while remaining > 0:
+            remaining -= 1
+            e = queue.popleft()
+            if e.sender is not None and e.sender not in self._listners:
+                continue
 
+            if stats is not None:
+                stats.events[type(e)] = stats.events.get(type(e), 0) + 1
+            if tracer is not None:
+                tracer.event(wave, e)
+            self._handle_event_instrumented(e, queue, stats, tracer)
             if self._terminate_immediate_flag:
+                for _ in range(remaining):
+                    queue.popleft()
                 break
 
-        return new_events
+        if self._batches:
+            self._flush_batches(queue, removals != self._removals, wave, stats, tracer)
+
+    def _handle_event_instrumented(self, event, new_events: EventsDeque, stats: EventLoopStats, tracer: Tracer):
+        """Same as _handle_event, but measures listeners and writes trace.
+        """
+        listeners = self._dispatch.get(type(event))
+        if listeners is None:
+            listeners = self._compile_dispatch(type(event))
+
+        if not listeners:
+            logging.warning("Unhandeled event %s", type(event))
+            return
+
+        player = self._player
+        try:
+            for l in listeners:
+                start = perf_counter()
+                if player is not None and id(l) in player.muted:
+                    evs = player.respond(l, event)
+                else:
+                    evs = l.accept(event)
+                if stats is not None and type(l) is not _BatchCollector:
+                    self._count_listener(stats, l, perf_counter() - start)
+
+                if evs is not None:
+                    products = self._products(l, evs)
+                    new_events.extend(products)
+                    if tracer is not None and products:
+                        tracer.response(l, products)
+
+                if self._terminate_immediate_flag:
+                    break
+        except Exception as exception:
+            raise RuntimeError(f"Exception during processing of event {event} by listener {l}") from exception
+
+    def _count_listener(self, stats: EventLoopStats, listener: Listener, time: float):
+        listener_stats = stats.listeners.get(type(listener))
+        if listener_stats is None:
+            listener_stats = stats.listeners[type(listener)] = ListenerStats()
+        listener_stats.calls += 1
+        listener_stats.time += time
+
+    def _compile_dispatch(self, event_type: type) -> tuple[Listener, ...]:
+        """Resolve listeners of event type through its MRO and wildcards, in subscription order.
+        Result is cached until a listener of the type or its base subscribes or unsubscribes.
+        """
+        sources = [self._map[t] for t in event_type.__mro__ if t in self._map]
+        if self._wildcards:
+            sources.append(self._wildcards)
+
+        if len(sources) == 1:
+            listeners = tuple(sources[0].values())
+        else:
+            merged = {key: l for source in sources for key, l in source.items()}
+            listeners = tuple(merged[key] for key in sorted(merged, key=self._order.__getitem__))
+
+        if self._batch_inputs:
+            listeners = self._collect_batches(event_type, listeners)
+
+        self._dispatch[event_type] = listeners
+        return listeners
+
+    def _collect_batches(self, event_type: type, listeners: tuple[Listener, ...]) -> tuple[Listener, ...]:
+        """Replace listeners accepting event type in batches by their collectors of the type.
+        """
+        compiled = []
+        for l in listeners:
+            batch_events = self._batch_inputs.get(id(l))
+            if batch_events is None or not issubclass(event_type, batch_events):
+                compiled.append(l)
+                continue
+            collectors = self._collectors.setdefault(id(l), {})
+            collector = collectors.get(event_type)
+            if collector is None:
+                collector = collectors[event_type] = _BatchCollector(l, self._batches)
+            compiled.append(collector)
+        return tuple(compiled)
+
+    def _invalidate_dispatch(self, input_events: set[type]):
+        """Drop cached dispatch tuples of event types derived from any of input_events.
+        """
+        bases = tuple(input_events)
+        for event_type in [t for t in self._dispatch if issubclass(t, bases)]:
+            del self._dispatch[event_type]
 
     def _handle_listeners_actions(self):
         for listener, action in self._listners_actions:
-            logging.debug("handle %s %s", action.name, listener)
             if action == EventLoop._ListnerAction.ADD:
                 self.subscribe(listener)
             elif action == EventLoop._ListnerAction.REMOVE:
@@ -0,0 +1,385 @@
+import importlib
+import struct
+from collections import deque
+from numbers import Integral, Real
+from typing import IO, Iterable
+
+from eventloop.tracing import Tracer
+
+
+MAGIC = b'EVJ2'
+
+# Record tags.
+_TYPE = b'T'
+_OBJECT = b'O'
+_KEY = b'K'
+_ITERATION = b'I'
+_RESPONSE = b'R'
+
+# Value tags.
+_NONE = b'n'
+_TRUE = b't'
+_FALSE = b'f'
+_INT = b'i'
+_FLOAT = b'd'
+_STR = b's'
+_REF = b'o'
+_DICT = b'm'
+
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+# wave, trigger type id, sender id, number of events
+_RESPONSE_HEADER = struct.Struct('<HHII')
+# type id, number of fields
+_EVENT_HEADER = struct.Struct('<HH')
+_MAX_FIELDS = 0xFFFF
+
+
+class JournalWriter(Tracer):
+    """Records produced events of given types into a compact append-only binary journal.
+    If sender types are given, only events produced by their instances are recorded.
+    Bind as EventLoop tracer, see TeeTracer to combine with another tracer.
+
+    Events are stored as responses: iteration, wave and type of the event that triggered
+    the response, or of the batch for batch listeners, sender and produced events. Each event is stored with its type and payload:
+    fields of the event except sender. Field values of None, bool, int, float, str and dicts
+    of them are stored inline, any other value is stored as a reference to an object, like sender.
+    Types, objects and field names are defined once, by the first record referring to them.
+
+    Senders defining move_state() have the returned dict recorded with each response as well.
+    It is read only while recording, so events carry no state, see Listener.replayed.
+    """
+
+    def __init__(self, file: str | IO[bytes], events: Iterable[type], senders: Iterable[type] = None):
+        if isinstance(file, str):
+            self.file = open(file, 'wb')
+            self._owned = True
+        else:
+            self.file = file
+            self._owned = False
+        self.events = tuple(events)
+        self.senders = None if senders is None else tuple(senders)
+        self._iteration = 0
+        self._written_iteration = None
+        self._wave = 0
+        self._trigger = None
+        self._types = dict[type, int]()
+        self._objects = dict[int, int]()
+        # Keep journaled objects alive, so their ids are not reused.
+        self._alive = []
+        self._keys = dict[str, int]()
+        self.file.write(MAGIC)
+
+    def iteration(self, iteration: int):
+        self._iteration = iteration
+
+    def event(self, wave: int, event):
+        self._wave = wave
+        self._trigger = type(event)
+
+    def batch(self, wave: int, event_type: type, events: list):
+        # Muted on replay, a batch listener responds to the first event of the type in the wave.
+        self._wave = wave
+        self._trigger = event_type
+
+    def response(self, listener, events: list):
+        if self.senders is not None and not isinstance(listener, self.senders):
+            return
+        journaled = [event for event in events if isinstance(event, self.events)]
+        if not journaled:
+            return
+
+        if self._written_iteration != self._iteration:
+            self._written_iteration = self._iteration
+            self.file.write(_ITERATION + _U32.pack(self._iteration))
+
+        # Definitions are written before the response record.
+        record = _RESPONSE + _RESPONSE_HEADER.pack(self._wave, self._type_id(self._trigger), self._object_id(listener), len(journaled))
+        for event in journaled:
+            fields = {key: value for key, value in _fields(event).items() if key != 'sender'}
+            record += _EVENT_HEADER.pack(self._type_id(type(event)), _count(fields)) + self._encode_fields(fields)
+        move_state = getattr(listener, 'move_state', None)
+        record += self._encode(None if move_state is None else move_state())
+        self.file.write(record)
+
+    def close(self):
+        if self._owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def _type_id(self, event_type: type) -> int:
+        type_id = self._types.get(event_type)
+        if type_id is None:
+            type_id = self._types[event_type] = len(self._types)
+            self.file.write(_TYPE + _U16.pack(type_id) + _str(event_type.__module__) + _str(event_type.__qualname__))
+        return type_id
+
+    def _object_id(self, object) -> int:
+        object_id = self._objects.get(id(object))
+        if object_id is None:
+            object_id = self._objects[id(object)] = len(self._objects)
+            self._alive.append(object)
+            name = getattr(object, 'name', None)
+            self.file.write(_OBJECT + _U32.pack(object_id) + _str(type(object).__qualname__)
+                            + (_NONE if name is None else _STR + _str(str(name))))
+        return object_id
+
+    def _key_id(self, key: str) -> int:
+        key_id = self._keys.get(key)
+        if key_id is None:
+            key_id = self._keys[key] = len(self._keys)
+            self.file.write(_KEY + _U16.pack(key_id) + _str(key))
+        return key_id
+
+    def _encode_fields(self, fields: dict) -> bytes:
+        return b''.join(_U16.pack(self._key_id(key)) + self._encode(value) for key, value in fields.items())
+
+    def _encode(self, value) -> bytes:
+        if value is None:
+            return _NONE
+        if value is True:
+            return _TRUE
+        if value is False:
+            return _FALSE
+        if type(value) is float:
+            return _FLOAT + _F64.pack(value)
+        if type(value) is str:
+            return _STR + _str(value)
+        if type(value) is dict:
+            return _DICT + _U16.pack(_count(value)) + self._encode_fields(value)
+        # Numpy scalars included.
+        if isinstance(value, Integral):
+            return _INT + _I64.pack(int(value))
+        if isinstance(value, Real):
+            return _FLOAT + _F64.pack(float(value))
+        return _REF + _U32.pack(self._object_id(value))
+
+
+class Journal:
+    """Journal loaded into memory.
+    """
+
+    class Response:
+        __slots__ = ('wave', 'trigger', 'sender', 'events', 'state')
+
+        def __init__(self, wave: int, trigger: type, sender: int, events: list[tuple[type, dict]], state: dict | None):
+            self.wave = wave
+            self.trigger = trigger
+            self.sender = sender
+            self.events = events
+            self.state = state
+
+    class Ref:
+        """Reference to a journaled object in record fields."""
+        __slots__ = ('id',)
+
+        def __init__(self, id: int):
+            self.id = id
+
+    def __init__(self):
+        self.objects = dict[int, tuple[str, str | None]]()
+        """Journaled objects: id to class name and name."""
+        self.iterations = dict[int, list[Journal.Response]]()
+        """Responses by iteration, in order."""
+
+    @staticmethod
+    def read(file: str | IO[bytes]) -> 'Journal':
+        if isinstance(file, str):
+            with open(file, 'rb') as f:
+                data = f.read()
+        else:
+            data = file.read()
+
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not an event journal")
+
+        journal = Journal()
+        types = dict[int, type]()
+        keys = dict[int, str]()
+        responses = None
+        reader = _Reader(data, len(MAGIC), keys)
+        while not reader.end():
+            tag = reader.bytes(1)
+            if tag == _RESPONSE:
+                wave, trigger, sender, n = reader.unpack(_RESPONSE_HEADER)
+                events = []
+                for _ in range(n):
+                    type_id, fields = reader.unpack(_EVENT_HEADER)
+                    events.append((types[type_id], reader.fields(fields)))
+                responses.append(Journal.Response(wave, types[trigger], sender, events, reader.value()))
+            elif tag == _ITERATION:
+                responses = journal.iterations.setdefault(reader.unpack(_U32)[0], [])
+            elif tag == _KEY:
+                key_id = reader.unpack(_U16)[0]
+                keys[key_id] = reader.str()
+            elif tag == _OBJECT:
+                object_id = reader.unpack(_U32)[0]
+                class_name = reader.str()
+                journal.objects[object_id] = class_name, reader.value()
+            elif tag == _TYPE:
+                type_id = reader.unpack(_U16)[0]
+                module = reader.str()
+                types[type_id] = _resolve_type(module, reader.str())
+            else:
+                raise ValueError(f"Corrupted event journal: unknown record {tag} at {reader.offset - 1}")
+        return journal
+
+    def senders(self) -> set[int]:
+        return {response.sender for responses in self.iterations.values() for response in responses}
+
+
+class JournalPlayer:
+    """Source of journaled events for EventLoop.replay().
+
+    Journaled objects are matched to given objects by class name and name, objects with equal
+    class name and name are matched in order. Senders of journaled events are muted: they stay
+    subscribed, but instead of accept they respond with their journaled responses to the events
+    of the same type in the same wave, see Listener.replayed.
+    """
+
+    def __init__(self, journal: Journal, objects: Iterable):
+        self.journal = journal
+        candidates = dict[tuple[str, str | None], list]()
+        for object in objects:
+            name = getattr(object, 'name', None)
+            candidates.setdefault((type(object).__qualname__, name), []).append(object)
+
+        self.objects = dict[int, object]()
+        for object_id, key in sorted(journal.objects.items()):
+            matches = candidates.get(key)
+            if not matches:
+                raise ValueError(f"Journaled object {key[0]} '{key[1]}' is not found")
+            self.objects[object_id] = matches.pop(0)
+
+        self.muted = {id(self.objects[sender]) for sender in journal.senders()}
+        self._responses = dict[tuple[int, int, type], deque[Journal.Response]]()
+        self._wave = 0
+
+    def is_muted(self, listener) -> bool:
+        return id(listener) in self.muted
+
+    def iteration(self, iteration: int):
+        self._responses.clear()
+        for response in self.journal.iterations.get(iteration, ()):
+            key = response.wave, id(self.objects[response.sender]), response.trigger
+            self._responses.setdefault(key, deque()).append(response)
+
+    def wave(self, wave: int):
+        self._wave = wave
+
+    def respond(self, listener, event) -> list | None:
+        """Journaled response of muted listener to the event.
+        """
+        responses = self._responses.get((self._wave, id(listener), type(event)))
+        if not responses:
+            return None
+        response = responses.popleft()
+        events = []
+        for event_type, fields in response.events:
+            produced = event_type.__new__(event_type)
+            for key, value in self._resolve(fields).items():
+                setattr(produced, key, value)
+            events.append(produced)
+        listener.replayed(events, None if response.state is None else self._resolve(response.state))
+        return events
+
+    def _resolve(self, fields: dict) -> dict:
+        resolved = {}
+        for key, value in fields.items():
+            if type(value) is Journal.Ref:
+                value = self.objects[value.id]
+            elif type(value) is dict:
+                value = self._resolve(value)
+            resolved[key] = value
+        return resolved
+
+
+class _Reader:
+
+    def __init__(self, data: bytes, offset: int, keys: dict[int, str]):
+        self.data = data
+        self.offset = offset
+        self.keys = keys
+
+    def end(self) -> bool:
+        return self.offset >= len(self.data)
+
+    def bytes(self, n: int) -> bytes:
+        value = self.data[self.offset:self.offset + n]
+        self.offset += n
+        return value
+
+    def unpack(self, format: struct.Struct) -> tuple:
+        value = format.unpack_from(self.data, self.offset)
+        self.offset += format.size
+        return value
+
+    def str(self) -> str:
+        n = self.unpack(_U16)[0]
+        return self.bytes(n).decode()
+
+    def fields(self, n: int) -> dict:
+        fields = {}
+        for _ in range(n):
+            key = self.keys[self.unpack(_U16)[0]]
+            fields[key] = self.value()
+        return fields
+
+    def value(self):
+        tag = self.bytes(1)
+        if tag == _FLOAT:
+            return self.unpack(_F64)[0]
+        if tag == _DICT:
+            return self.fields(self.unpack(_U16)[0])
+        if tag == _REF:
+            return Journal.Ref(self.unpack(_U32)[0])
+        if tag == _INT:
+            return self.unpack(_I64)[0]
+        if tag == _STR:
+            return self.str()
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        raise ValueError(f"Corrupted event journal: unknown value {tag} at {self.offset - 1}")
+
+
+_slots = dict[type, tuple[str, ...]]()
+
+
+def _fields(event) -> dict:
+    """Set attributes of event, slotted and dynamic.
+    """
+    names = _slots.get(type(event))
+    if names is None:
+        names = []
+        for cls in reversed(type(event).__mro__):
+            slots = cls.__dict__.get('__slots__', ())
+            names += [slots] if isinstance(slots, str) else [name for name in slots if name not in ('__dict__', '__weakref__')]
+        names = _slots[type(event)] = tuple(names)
+    fields = {name: getattr(event, name) for name in names if hasattr(event, name)}
+    fields.update(getattr(event, '__dict__', {}))
+    return fields
+
+
+def _count(fields: dict) -> int:
+    if len(fields) > _MAX_FIELDS:
+        raise ValueError(f"Expected at most {_MAX_FIELDS} fields (got {len(fields)})")
+    return len(fields)
+
+
+def _str(value: str) -> bytes:
+    encoded = value.encode()
+    return _U16.pack(len(encoded)) + encoded
+
+
+def _resolve_type(module: str, qualname: str) -> type:
+    resolved = importlib.import_module(module)
+    for name in qualname.split('.'):
+        resolved = getattr(resolved, name)
+    return resolved
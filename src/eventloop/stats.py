@@ -0,0 +1,46 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ListenerStats:
+    calls: int = 0
+    """Number of accept and accept_batch calls."""
+    time: float = 0
+    """Wall time spent in accept and accept_batch, seconds."""
+
+
+@dataclass
+class EventLoopStats:
+    """Statistics collected by EventLoop in instrumentation mode.
+    """
+    iterations: int = 0
+    waves: int = 0
+    events: dict[type, int] = field(default_factory=dict)
+    """Number of handled events per event type."""
+    listeners: dict[type, ListenerStats] = field(default_factory=dict)
+    """Calls and wall time per listener class."""
+    wave_production: list[int] = field(default_factory=list)
+    """Number of events produced by the n-th wave of an iteration, summed over iterations."""
+    iteration_production_max: int = 0
+    """Maximum number of events produced during a single iteration."""
+
+    def produced(self) -> int:
+        return sum(self.wave_production)
+
+    def time(self) -> float:
+        return sum(listener.time for listener in self.listeners.values())
+
+    def summary(self) -> str:
+        lines = [f"iterations: {self.iterations}, waves: {self.waves}, "
+                 f"produced: {self.produced()} (max {self.iteration_production_max} per iteration)"]
+
+        lines += ['events:']
+        for event_type, n in sorted(self.events.items(), key=lambda item: -item[1]):
+            lines += [f"  {event_type.__qualname__}: {n}"]
+
+        lines += ['listeners:']
+        for listener_type, stats in sorted(self.listeners.items(), key=lambda item: -item[1].time):
+            lines += [f"  {listener_type.__qualname__}: {stats.calls} calls, {stats.time:.3f}s"]
+
+        lines += ['produced per wave: ' + ', '.join(str(n) for n in self.wave_production)]
+        return '\n'.join(lines)
@@ -0,0 +1,172 @@
+import json
+import logging
+from typing import IO
+
+
+class Tracer:
+    """Receives trace records of an EventLoop. Bound by the loop at construction.
+    Base implementation ignores everything.
+    """
+
+    def iteration(self, iteration: int):
+        """Iteration started."""
+        pass
+
+    def event(self, wave: int, event):
+        """Event is going to be handled by listeners."""
+        pass
+
+    def batch(self, wave: int, event_type: type, events: list):
+        """Events of event_type collected during the wave are going to be handled by a batch listener.
+        The listener's response follows, triggered by the batch."""
+        pass
+
+    def response(self, listener, events: list):
+        """Listener produced events."""
+        pass
+
+    def subscribe(self, listener, events):
+        """Listener subscribed to events. None means any event."""
+        pass
+
+    def unsubscribe(self, listener):
+        """Listener unsubscribed."""
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class LoggingTracer(Tracer):
+    """Writes trace into log with debug level.
+    """
+
+    def __init__(self, logger: logging.Logger = None):
+        self.logger = logger or logging.getLogger()
+
+    def iteration(self, iteration: int):
+        self.logger.debug('= = = ITERATION %d = = =', iteration)
+
+    def event(self, wave: int, event):
+        self.logger.debug("handle event %s", event)
+
+    def batch(self, wave: int, event_type: type, events: list):
+        self.logger.debug("handle batch of %d events %s", len(events), event_type.__name__)
+
+    def response(self, listener, events: list):
+        self.logger.debug("\t%s responded with %s", listener, events)
+
+    def subscribe(self, listener, events):
+        self.logger.debug("subscribed %s to events %s", listener, events)
+
+    def unsubscribe(self, listener):
+        self.logger.debug("unsubscribed %s", listener)
+
+
+class JsonlTracer(Tracer):
+    """Writes trace as JSON lines. Objects are referred to by ids, which are
+    defined by subscribe records or by the first record referring to them:
+        {"i": iteration}
+        {"w": wave, "e": event type, "s": sender id}
+        {"w": wave, "b": batched event type, "n": number of events}
+        {"r": listener id, "p": [produced event types]}
+        {"sub": listener id, "c": class, "n": name, "e": [event types] or null}
+        {"obj": id, "c": class, "n": name}
+        {"unsub": listener id}
+    """
+
+    def __init__(self, file: str | IO[str]):
+        if isinstance(file, str):
+            self.file = open(file, 'wt')
+            self._owned = True
+        else:
+            self.file = file
+            self._owned = False
+        self._ids = dict[int, int]()
+        # Keep traced objects alive, so their ids are not reused.
+        self._objects = []
+
+    def iteration(self, iteration: int):
+        self._write({'i': iteration})
+
+    def event(self, wave: int, event):
+        sender = getattr(event, 'sender', None)
+        self._write({'w': wave, 'e': type(event).__name__, 's': self._id(sender)})
+
+    def batch(self, wave: int, event_type: type, events: list):
+        self._write({'w': wave, 'b': event_type.__name__, 'n': len(events)})
+
+    def response(self, listener, events: list):
+        self._write({'r': self._id(listener), 'p': [type(event).__name__ for event in events]})
+
+    def subscribe(self, listener, events):
+        trace_id = self._id(listener, define=False)
+        self._write({'sub': trace_id, 'c': type(listener).__name__, 'n': getattr(listener, 'name', None),
+                     'e': None if events is None else sorted(event.__name__ for event in events)})
+
+    def unsubscribe(self, listener):
+        self._write({'unsub': self._id(listener)})
+
+    def close(self):
+        if self._owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def _id(self, object, define=True) -> int | None:
+        if object is None:
+            return None
+        trace_id = self._ids.get(id(object))
+        if trace_id is None:
+            trace_id = self._ids[id(object)] = len(self._ids)
+            self._objects.append(object)
+            if define:
+                self._write({'obj': trace_id, 'c': type(object).__name__, 'n': getattr(object, 'name', None)})
+        return trace_id
+
+    def _write(self, record: dict):
+        self.file.write(json.dumps(record, separators=(',', ':')))
+        self.file.write('\n')
+
+
+
+class TeeTracer(Tracer):
+    """Passes trace records to several tracers.
+    """
+
+    def __init__(self, *tracers: Tracer):
+        self.tracers = tracers
+
+    def iteration(self, iteration: int):
+        for tracer in self.tracers:
+            tracer.iteration(iteration)
+
+    def event(self, wave: int, event):
+        for tracer in self.tracers:
+            tracer.event(wave, event)
+
+    def batch(self, wave: int, event_type: type, events: list):
+        for tracer in self.tracers:
+            tracer.batch(wave, event_type, events)
+
+    def response(self, listener, events: list):
+        for tracer in self.tracers:
+            tracer.response(listener, events)
+
+    def subscribe(self, listener, events):
+        for tracer in self.tracers:
+            tracer.subscribe(listener, events)
+
+    def unsubscribe(self, listener):
+        for tracer in self.tracers:
+            tracer.unsubscribe(listener)
+
+    def close(self):
+        for tracer in self.tracers:
+            tracer.close()
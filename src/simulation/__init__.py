@@ -5,3 +5,4 @@ from simulation.moveable.moveable import Moveable
 from simulation.environment.environment import Environment, Driver
 from simulation.body import Body
 from simulation.timer import Timer
+from simulation.environment.batch import BatchEnvironment
@@ -3,36 +3,104 @@ from eventloop.eventloop import Event
 from helpers import Cached, coalesce
 from simulation import Moveable
 from simulation import Location
-from simulation.math.rk2a import rk2a
+from simulation.math.rk2a import rk2a_motion
 from simulation.moveable.events import Move
+from simulation.state import State, view
 from typing import Callable
-import numpy
 
 
 class Body(Moveable):
+    __slots__ = ('_state', '_row', '_v', '_mass')
+
     def __init__(self, location: Location, mass: float, v: float = 0, name: str = None):
-        super().__init__(location, name=name)
+        # Array-backed state and row, when bound.
+        self._state = None
+        self._row = None
+        # Environment shifts location in place, so body owns a copy: default locations are shared.
+        super().__init__(location.copy(), name=name)
         self.mass = mass
         self.v = v
         # self._next = Cached[Body]
 
+    @property
+    def location(self) -> Location:
+        return self._location
+
+    @location.setter
+    def location(self, location: Location):
+        if self._state is None:
+            self._location = location
+        else:
+            self._state.x[self._row] = location.x()
+
+    @property
+    def v(self) -> float:
+        return self._v if self._state is None else float(self._state.v[self._row])
+
+    @v.setter
+    def v(self, v: float):
+        if self._state is None:
+            self._v = v
+        else:
+            self._state.v[self._row] = v
+
+    @property
+    def mass(self) -> float:
+        return self._mass if self._state is None else float(self._state.mass[self._row])
+
+    @mass.setter
+    def mass(self, mass: float):
+        if self._state is None:
+            self._mass = mass
+        else:
+            self._state.mass[self._row] = mass
+
+    def bind(self, state: 'State', row: int):
+        """Make body a view over the row of array-backed state. Called by State.
+        """
+        self._state = state
+        self._row = row
+        self._location = view(self._location, self)
+
+    def unbind(self):
+        """Copy state from the row back into body. Called by State.
+        """
+        state, row = self._state, self._row
+        location = state.location(float(state.x[row]))
+        v, mass = float(state.v[row]), float(state.mass[row])
+        self._state = None
+        self._row = None
+        self._location = location
+        self.v = v
+        self.mass = mass
+
+    def snapshot(self):
+        return super().snapshot(), self.v, self.mass
+
+    def restore(self, state):
+        location, self.v, self.mass = state
+        super().restore(location)
+
     def move(self, dt) -> Move:
         return Move(dt * self.v)
 
+    def move_state(self) -> dict:
+        """State recorded with journaled responses of the body, see JournalWriter.
+        """
+        return {'v': self.v}
+
+    def replayed(self, events: list[Event], state: dict = None):
+        for name, value in (state or {}).items():
+            setattr(self, name, value)
+
     def push(self, dt: float, force: Callable[[float, float, float], float]) -> Move:
         """Push object for dt time with force, depending on (t, x, v).
+        Integrated by the integrator of environment, rk2 if body is not added to any.
         """
-        def x_v_diff(xv, t):
-            return numpy.asarray([
-                # x'
-                xv[1],
-                # v'
-                force(t, xv[0], xv[1]) / self.mass
-            ])
-
-        xv = rk2a(x_v_diff, [0, self.v], [0, dt])[-1]
-        self.v = max(0, xv[1])
-        return Move(max(0, xv[0]))
+        integrate = rk2a_motion if self.environment is None else self.environment.integrator
+        x, v = integrate(force, self.mass, self.v, dt)
+        self.v = max(0, v)
+        return Move(max(0, x))
 
     def next(self, environment) -> 'Body':
-        return self.next_in(environment.bodies)
\ No newline at end of file
+        return environment.next_of(self)
\ No newline at end of file
@@ -0,0 +1,279 @@
+from eventloop import Event, Listener
+from eventloop.events import RemoveListener, Terminate
+from helpers import coalesce, to_iterable
+from simulation.body import Body
+from simulation.environment.environment import Environment, Tick, Collision, next_in, prev_in
+from simulation.location import CircleSpace, collides, same_space
+from simulation.math.integrators import Integrator, integrator as find_integrator
+from simulation.moveable.events import Move
+from simulation.object import Object
+from simulation.state import State
+import numpy
+
+
+class World:
+    """One of the worlds of a BatchEnvironment. Passed to listeners as Tick.environment,
+    provides the part of Environment interface used by objects: time, dt, bodies and neighbours.
+    """
+
+    def __init__(self, batch: 'BatchEnvironment', index: int, listeners: list[Listener]):
+        self.batch = batch
+        self.index = index
+        self.listeners = list(listeners)
+        # Columns are views of the batch rows, see BatchEnvironment.
+        self.state = State()
+        self._tick = Tick(self)
+        self._dispatch = dict[type, list[Listener]]()
+
+    @property
+    def time(self) -> float:
+        return self.batch.time
+
+    @property
+    def dt(self) -> float:
+        return self.batch.dt
+
+    @property
+    def integrator(self) -> Integrator:
+        return self.batch.integrator
+
+    @property
+    def bodies(self) -> list[Body]:
+        return self.state.bodies
+
+    @property
+    def running(self) -> bool:
+        return bool(self.batch.running[self.index])
+
+    def index_of(self, body: Body) -> int | None:
+        return body._row if body._state is self.state else None
+
+    def next_of(self, body: Body) -> Body | None:
+        return next_in(self.bodies, self.index_of(body))
+
+    def prev_of(self, body: Body) -> Body | None:
+        return prev_in(self.bodies, self.index_of(body))
+
+    def update(self, collisions: list[tuple[Body, Body]]):
+        """Deliver collisions and tick to listeners and handle their responses, as an event loop would:
+        removals first, then moves of the remaining bodies. Immediate termination drops the moves.
+        """
+        events = [Collision(collider, collidee, time=self.time) for collider, collidee in collisions]
+        events.append(self._tick)
+
+        produced = []
+        for event in events:
+            for listener in self._listeners_of(type(event)):
+                for product in _products(listener.accept(event)):
+                    if isinstance(product, Terminate) and product.immediate:
+                        self.batch.running[self.index] = False
+                        return
+                    produced.append((listener, product))
+
+        moves, removed = [], []
+        for sender, event in produced:
+            if isinstance(event, Move):
+                moves.append((sender, event))
+            elif isinstance(event, RemoveListener):
+                removed.append(event.listener)
+            elif isinstance(event, Terminate):
+                self.batch.running[self.index] = False
+            else:
+                raise RuntimeError(f"Unhandeled event: {event}")
+        self.remove_many(removed)
+
+        dx = self.batch.dx[self.index]
+        for sender, move in moves:
+            if not isinstance(sender, Body):
+                raise RuntimeError(f"Unhandeled event: {move}")
+            # Moves of removed senders are dropped.
+            if sender._state is not self.state:
+                continue
+            if move.dx < 0:
+                raise RuntimeError(f"Expected dx >= 0 (dx = {move.dx})")
+            dx[sender._row] = move.dx
+
+    def remove(self, listener: Listener):
+        self.remove_many([listener])
+
+    def remove_many(self, listeners: list[Listener]):
+        """Unsubscribe listeners at once. Rows of remaining bodies are compacted in one pass,
+        so rows of present bodies stay first. Not subscribed listeners are ignored.
+        """
+        removed = {id(listener) for listener in listeners}
+        if not removed:
+            return
+        kept = [l for l in self.listeners if id(l) not in removed]
+        if len(kept) == len(self.listeners):
+            return
+        self.listeners = kept
+        self._dispatch.clear()
+
+        rows = [body._row for body in self.bodies if id(body) in removed]
+        if rows:
+            n = len(self.bodies)
+            for row in rows:
+                self.bodies[row].unbind()
+            self.state.bodies = [body for body in self.bodies if id(body) not in removed]
+            self.batch._compact(self.index, rows, n)
+            for row in range(rows[0], len(self.bodies)):
+                self.bodies[row]._row = row
+
+    def _listeners_of(self, event_type: type) -> list[Listener]:
+        listeners = self._dispatch.get(event_type)
+        if listeners is None:
+            listeners = self._dispatch[event_type] = [l for l in self.listeners if _accepts(l, event_type)]
+        return listeners
+
+
+class BatchEnvironment:
+    """Independent worlds advanced in lock-step by a single loop. States of bodies of all worlds are kept
+    in (K, N) arrays, where K is the number of worlds and N is the maximum number of bodies in a world.
+    Collisions are detected and moves are applied for all worlds at once, then each world delivers
+    collisions and tick to its listeners. Terminated worlds are masked out and the rest keep going.
+
+    Each world behaves as a separate Environment driven by a FAST driver: listeners accept Collision
+    and Tick events and may respond with Move, RemoveListener and Terminate. Bodies of all worlds
+    must share the same space: a line or circles of the same length.
+    """
+
+    def __init__(self, worlds: list[list[Listener]], dt: float = None, timeout: float = None, integrator: str | Integrator = 'rk2'):
+        """Batch environment constructor.
+
+        Args:
+            worlds (list[list[Listener]]): Listeners of each world in order of subscription.
+            dt (float, optional): Time step, seconds.
+            timeout (float, optional): Simulated time, after which all worlds terminate, as simulation.Timer would.
+            integrator (str | Integrator): Integrator of pushes of bodies or its name, see simulation.math.integrators.
+        """
+        self.dt = coalesce(dt, Environment.DEFAULT_DT)
+        self.integrator = find_integrator(integrator)
+        self.timeout = timeout
+        self.time = 0
+        self._updates = 0
+        self.worlds = [World(self, k, listeners) for k, listeners in enumerate(worlds)]
+
+        bodies = [[l for l in world.listeners if isinstance(l, Body)] for world in self.worlds]
+        shape = len(self.worlds), max((len(b) for b in bodies), default=0)
+        for column in State.COLUMNS:
+            setattr(self, column, numpy.zeros(shape))
+        self.present = numpy.zeros(shape, dtype=bool)
+        """Whether row holds a body. Rows of present bodies go first."""
+        self.running = numpy.ones(len(self.worlds), dtype=bool)
+        self.space = None
+
+        for world, world_bodies in zip(self.worlds, bodies):
+            k = world.index
+            for column in State.COLUMNS:
+                setattr(world.state, column, getattr(self, column)[k])
+            for listener in world.listeners:
+                if isinstance(listener, Object):
+                    listener.environment = world
+            # Stable sort keeps subscription order for equal positions, as insort does.
+            for row, body in enumerate(sorted(world_bodies, key=lambda b: b.location.x())):
+                location = body.location
+                if self.space is None:
+                    self.space = location.space
+                elif not same_space(self.space, location.space):
+                    raise RuntimeError(f"Expected all bodies in {self.space} (got {location.space})")
+                self.x[k, row] = self.x0[k, row] = location.x()
+                self.v[k, row] = body.v
+                self.mass[k, row] = body.mass
+                self.present[k, row] = True
+                world.state.bodies.append(body)
+                body.bind(world.state, row)
+            world.state.space = self.space
+
+    def simulate(self):
+        while self.iterate():
+            pass
+
+    def iterate(self) -> bool:
+        """Advance running worlds by one update. Returns whether any world is still running.
+        """
+        self.time = self._updates * self.dt
+        collisions = self.detect_collisions()
+        # Collisions are detected in the order before moves, which may have reordered bodies.
+        self.repair_order()
+        self.x0[:] = self.x
+        self.dx[:] = 0
+        self._updates += 1
+
+        moving = self.running.copy()
+        for world in self.worlds:
+            if world.running:
+                world.update(collisions.get(world.index, []))
+
+        if self.timeout is not None and self.time >= self.timeout:
+            self.running[:] = False
+        self._move(moving)
+        return bool(self.running.any())
+
+    def detect_collisions(self) -> dict[int, list[tuple[Body, Body]]]:
+        """Collisions of the last moves of running worlds: world index to pairs of collider and collidee.
+        """
+        K, N = self.x.shape
+        if N < 2:
+            return {}
+        n = self.present.sum(axis=1)
+        # Next present row, rows of present bodies go first.
+        next_row = (numpy.arange(N) + 1) % numpy.maximum(n, 1)[:, None]
+        mask = collides(self.space, self.x0, self.dx,
+                        numpy.take_along_axis(self.x0, next_row, axis=1), numpy.take_along_axis(self.dx, next_row, axis=1))
+        mask &= self.present & (self.running & (n >= 2))[:, None]
+
+        collisions = dict[int, list[tuple[Body, Body]]]()
+        for k, i in zip(*(index.tolist() for index in numpy.nonzero(mask))):
+            bodies = self.worlds[k].bodies
+            collisions.setdefault(k, []).append((bodies[i], bodies[next_row[k, i]]))
+        return collisions
+
+    def repair_order(self):
+        """Restore order of bodies by position in worlds, where moves reordered them.
+        """
+        key = numpy.where(self.present, self.x, numpy.inf)
+        for k in numpy.flatnonzero((key[:, 1:] < key[:, :-1]).any(axis=1)).tolist():
+            order = numpy.argsort(key[k], kind='stable')
+            self._permute(k, order)
+            state = self.worlds[k].state
+            state.bodies[:] = [state.bodies[i] for i in order[:len(state.bodies)].tolist()]
+            for row, body in enumerate(state.bodies):
+                body._row = row
+
+    def _move(self, worlds: numpy.ndarray):
+        dx = numpy.where(worlds[:, None], self.dx, 0)
+        # Same arithmetic as State.move, rows of not moved bodies are not changed.
+        numpy.add(self.x, dx, out=self.x)
+        if isinstance(self.space, CircleSpace):
+            length = self.space.length()
+            self.x -= length * numpy.floor(self.x / length)
+
+    def _permute(self, k: int, order: numpy.ndarray):
+        # In place, so views of worlds' states stay valid.
+        for column in State.COLUMNS + ('present',):
+            values = getattr(self, column)
+            values[k] = values[k][order]
+
+    def _compact(self, k: int, rows: list[int], n: int):
+        """Drop rows of world k, shifting the rest of n present rows."""
+        keep = numpy.ones(n, dtype=bool)
+        keep[rows] = False
+        m = n - len(rows)
+        for column in State.COLUMNS:
+            values = getattr(self, column)
+            values[k, :m] = values[k, :n][keep]
+        self.present[k, m:n] = False
+
+
+def _accepts(listener: Listener, event_type: type) -> bool:
+    input_events = listener.input_events()
+    return input_events is None or any(issubclass(event_type, t) for t in to_iterable(input_events))
+
+
+def _products(response) -> list[Event]:
+    """Events of a listener's response, as an event loop accepts them."""
+    if response is None:
+        return []
+    if isinstance(response, Event):
+        return [response]
+    return [event() if isinstance(event, type) else event for event in to_iterable(response)]
@@ -3,16 +3,23 @@ from dataclasses import dataclass
 from enum import Enum
 from eventloop.eventloop import Iteration
 from eventloop.events import AddListener, RemoveListener
-from helpers import IdentitySet, coalesce, not_implemented, remove_by_identity
+from helpers import IdentitySet, coalesce
 from eventloop import Listener, CallbackListener, Event, EventLoop
+from eventloop.tracing import Tracer
 from simulation import Object, Moveable
 from simulation.body import Body
-from simulation.location import Path
+from simulation.location import Path, collisions, same_space
+from simulation.math.integrators import Integrator, integrator as find_integrator
 from simulation.moveable.events import Move
-from bisect import insort
+from simulation.state import State
+from bisect import bisect_right, insort
+from math import sqrt
+from time import monotonic, sleep
+from typing import Callable, Iterable
+import numpy
 
 
-@dataclass
+@dataclass(slots=True)
 class Tick(Event):
     """Request from Environment to Objects to calculate their state
        in moment time + dt.
@@ -24,9 +31,9 @@ class UpdateRequest(Event):
     """Request from Driver to Environment to increment time by dt
        and update its state accordingly.
     """
-    pass
+    __slots__ = ()
 
-@dataclass
+@dataclass(slots=True)
 class Collision(Event):
     # Who hit
     collider: Moveable
@@ -40,31 +47,117 @@ class Driver(Listener):
         FAST = 'fast'
         REALTIME = 'realtime'
 
-    def __init__(self, type: Type = Type.FAST):
+    class Policy(Enum):
+        # Missed ticks are emitted back to back, until the driver is on schedule again.
+        CATCH_UP = 'catch_up'
+        # Missed ticks are dropped, schedule is shifted to the last due tick.
+        SKIP = 'skip'
+
+    @dataclass
+    class Stats:
+        """Pacing statistics of a realtime driver. Lateness is the difference
+        between the moment a tick was emitted and its deadline, seconds.
+        """
+        ticks: int = 0
+        overruns: int = 0
+        """Number of ticks emitted when the next tick was already due."""
+        skipped: int = 0
+        """Number of ticks dropped by SKIP policy."""
+        lateness_max: float = 0
+        lateness_sum: float = 0
+        lateness_sq_sum: float = 0
+
+        def lateness_mean(self) -> float:
+            return self.lateness_sum / self.ticks if self.ticks else 0
+
+        def jitter(self) -> float:
+            """Standard deviation of lateness."""
+            if not self.ticks:
+                return 0
+            mean = self.lateness_mean()
+            return sqrt(max(0, self.lateness_sq_sum / self.ticks - mean * mean))
+
+    def __init__(self, type: Type = Type.FAST, dt: float = None, policy: Policy = Policy.CATCH_UP,
+                 clock: Callable[[], float] = monotonic, sleep: Callable[[float], None] = sleep):
+        """Driver constructor.
+
+        Args:
+            type (Type): FAST emits update as soon as possible, REALTIME paces updates to wall clock.
+            dt (float, optional): Realtime tick period, seconds. Defaults to dt of the Environment.
+            policy (Policy): What a realtime driver does when it falls behind schedule.
+            clock (Callable, optional): Monotonic time source, seconds.
+            sleep (Callable, optional): Blocks for given number of seconds.
+        """
+        self.type = type
+        # Requested period, dt is the period of the environment the driver is bound to.
+        self._dt = dt
+        self.dt = dt
+        self.stats = Driver.Stats()
         if type == Driver.Type.FAST:
             self.init_fast()
         elif type == Driver.Type.REALTIME:
-            self.init_realtime()
+            self.init_realtime(policy, clock, sleep)
         else:
             raise RuntimeError(f"Unknown driver type {type}")
-    
-    @not_implemented
-    def init_realtime(self):
-        pass
+
+    def init_realtime(self, policy: Policy, clock: Callable[[], float], sleep: Callable[[float], None]):
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        # Schedule is anchored at the first iteration: tick n is due at start + n * dt.
+        self.start = None
+        self.next_tick = 0
+        self.handler = self._pace
 
     def init_fast(self):
         self.handler = lambda _: UpdateRequest
-    
+
+    def bind(self, environment: 'Environment'):
+        """Called by Environment the driver is attached to. Schedule of a realtime driver starts over."""
+        self.dt = coalesce(self._dt, environment.dt)
+        if self.type == Driver.Type.REALTIME:
+            self.start = None
+            self.next_tick = 0
+
     def input_events(self) -> set:
         return Iteration
 
     def accept(self, event: Event) -> list[Event]:
         return self.handler(event)
 
+    def _pace(self, _):
+        now = self.clock()
+        if self.start is None:
+            self.start = now
+        deadline = self.start + self.next_tick * self.dt
+        # Sleep towards absolute deadline, so oversleeping does not accumulate.
+        while now < deadline:
+            self.sleep(deadline - now)
+            now = self.clock()
+
+        lateness = now - deadline
+        stats = self.stats
+        if lateness >= self.dt:
+            stats.overruns += 1
+            if self.policy == Driver.Policy.SKIP:
+                skipped = int(lateness / self.dt)
+                stats.skipped += skipped
+                self.next_tick += skipped
+                lateness -= skipped * self.dt
+
+        self.next_tick += 1
+        stats.ticks += 1
+        stats.lateness_sum += lateness
+        stats.lateness_sq_sum += lateness * lateness
+        if lateness > stats.lateness_max:
+            stats.lateness_max = lateness
+        return UpdateRequest
+
 class Environment:
 
     DEFAULT_DT = 0.01
     INPUT_EVENTS = {UpdateRequest, Move, AddListener, RemoveListener}
+    BATCH_EVENTS = {Move, RemoveListener}
 
     # Unordered cache.
     Objects = IdentitySet[Object]
@@ -73,38 +166,147 @@ class Environment:
     # Ordered.
     Bodies = list[Moveable]
 
-    def __init__(self, dt: float = None, driver: Driver = Driver(type = Driver.Type.FAST)):
+    @dataclass
+    class Snapshot:
+        """State of an environment between iterations, see Environment.snapshot.
+        """
+        loop: EventLoop.Snapshot
+        time: float
+        updates: int
+        objects: list[Object]
+        moveables: list[Moveable]
+        bodies: list[Moveable]
+        x0: numpy.ndarray
+        dx: numpy.ndarray
+        state: tuple | None
+
+    def __init__(self, dt: float = None, driver: Driver = None, tracer: Tracer = None, arrays: bool = False,
+                 integrator: str | Integrator = 'rk2'):
+        """Environment constructor.
+
+        Args:
+            dt (float, optional): Time step, seconds.
+            driver (Driver, optional): Source of updates, a FAST driver by default.
+            tracer (Tracer, optional): Receiver of event loop trace.
+            arrays (bool): Keep bodies' state in arrays, see state. Bodies must share the same space.
+            integrator (str | Integrator): Integrator of pushes of bodies or its name, see simulation.math.integrators.
+        """
         # Environmental parameters.
         self.dt = coalesce(dt, Environment.DEFAULT_DT)
+        self.integrator = find_integrator(integrator)
 
         # Objects' cache.
         self.objects = Environment.Objects()
         self.moveables = Environment.Moveables()
         self.bodies = Environment.Bodies()
+        # Array-backed state of bodies, rows are aligned with bodies.
+        self.state = State() if arrays else None
+        # Identity of body to its index in bodies. Built on demand, dropped when order changes.
+        self._index = None
+        # Objects removed during the current update, see _accept_batch.
+        self._removed = Environment.Objects()
 
         # Number of updates already done.
         # During each update objects are asked to calculate their state in the next point of time.
         # Time is incremented when the next update starts.
         self.time = 0
         self._updates = 0
-        self._moves = {}
-        self.loop = EventLoop()
-        self.loop.subscribe(CallbackListener(accept_callback=self._accept, input_events=Environment.INPUT_EVENTS))
+        # Without arrays: positions at the start of the current update and distances moved,
+        # aligned with bodies. NaN position means the body has not moved yet.
+        self._x0 = numpy.empty(0)
+        self._dx = numpy.empty(0)
+        self.loop = EventLoop(tracer=tracer)
+        self.loop.subscribe(CallbackListener(accept_callback=self._accept, input_events=Environment.INPUT_EVENTS,
+                                             accept_batch_callback=self._accept_batch, batch_events=Environment.BATCH_EVENTS))
+        if driver is None:
+            driver = Driver(type=Driver.Type.FAST)
+        driver.bind(self)
         self.loop.subscribe(driver)
     
     def subscribe(self, *listeners):
         for listener in listeners:
             self.loop.put(AddListener(listener))
 
+    def add_many(self, listeners: Iterable[Listener]):
+        """Subscribe listeners at once, without AddListener events. Bodies and moveables are merged
+        into their order by one stable sort and caches of neighbours are invalidated once.
+        Listeners are added immediately, so call between iterations. Listeners put to subscribe
+        earlier and not added yet are subscribed after them.
+        """
+        listeners = list(listeners)
+        self.loop.subscribe_many(listeners)
+
+        bodies, moveables = [], []
+        for listener in listeners:
+            if isinstance(listener, Object):
+                self._add_object(listener)
+                if isinstance(listener, Body):
+                    bodies.append(listener)
+                if isinstance(listener, Moveable):
+                    moveables.append(listener)
+
+        order = _merge(self.moveables, moveables, lambda moveable: insort(self.moveables, moveable, key=_position))
+        if order is not None:
+            merged = self.moveables + moveables
+            self.moveables = [merged[i] for i in order]
+        self._index = None
+        if self.state is not None:
+            self.state.insert_many(bodies)
+            self.bodies[:] = self.state.bodies
+            return
+
+        def insert(body: Body):
+            index = bisect_right(self.bodies, body.location.x(), key=_position)
+            self.bodies.insert(index, body)
+            self._x0 = numpy.insert(self._x0, index, numpy.nan)
+            self._dx = numpy.insert(self._dx, index, 0)
+
+        order = _merge(self.bodies, bodies, insert)
+        if order is not None:
+            merged = self.bodies + bodies
+            self.bodies = [merged[i] for i in order]
+            self._x0 = numpy.concatenate([self._x0, numpy.full(len(bodies), numpy.nan)])[order]
+            self._dx = numpy.concatenate([self._dx, numpy.zeros(len(bodies))])[order]
+
     def put(self, event):
         self.loop.put(event=event)
 
     def simulate(self):
         self.loop.loop()
 
+    async def simulate_async(self, yield_every: int = 1):
+        await self.loop.loop_async(yield_every=yield_every)
+
     def iterate(self):
         self.loop.iterate()
 
+    def snapshot(self) -> 'Environment.Snapshot':
+        """Capture time, bodies, states of listeners and pending events, see EventLoop.snapshot.
+        Call between iterations. A common prefix of simulations can be simulated once,
+        then each branch restores the snapshot and subscribes its own objects.
+        """
+        return Environment.Snapshot(loop=self.loop.snapshot(), time=self.time, updates=self._updates,
+                                    objects=list(self.objects), moveables=list(self.moveables), bodies=list(self.bodies),
+                                    x0=self._x0.copy(), dx=self._dx.copy(),
+                                    state=None if self.state is None else self.state.snapshot())
+
+    def restore(self, snapshot: 'Environment.Snapshot'):
+        """Bring back the environment to the snapshot. Same snapshot may be restored many times.
+        """
+        if self.state is not None:
+            # Bodies are rebound before they restore their state through the rows.
+            self.state.restore(snapshot.state)
+        self.loop.restore(snapshot.loop)
+        self.time = snapshot.time
+        self._updates = snapshot.updates
+        self.objects = Environment.Objects(snapshot.objects)
+        self.moveables = list(snapshot.moveables)
+        self.bodies = list(snapshot.bodies)
+        self._x0 = snapshot.x0.copy()
+        self._dx = snapshot.dx.copy()
+        self._index = None
+        self._removed.clear()
+
     def _add_object(self, object: Object):
         object.environment = self
         self.objects.add(object)
@@ -115,7 +317,16 @@ class Environment:
 
     def _add_body(self, body: Body):
         self._add_moveable(body)
-        insort(self.bodies, body, key=lambda b: b.location.x())
+        self._index = None
+        if self.state is None:
+            index = bisect_right(self.bodies, body.location.x(), key=lambda b: b.location.x())
+            self.bodies.insert(index, body)
+            self._x0 = numpy.insert(self._x0, index, numpy.nan)
+            self._dx = numpy.insert(self._dx, index, 0)
+        else:
+            index = int(numpy.searchsorted(self.state.x, body.location.x(), side='right'))
+            self.bodies.insert(index, body)
+            self.state.insert(index, body)
 
     def _accept(self, event):
 
@@ -123,8 +334,15 @@ class Environment:
             self.time = self._updates * self.dt
 
             collisions = self.detect_collision()
-            self._moves = {}
+            # Collisions are detected in the order before moves, which may have reordered bodies.
+            self.repair_order()
+            if self.state is None:
+                self._x0.fill(numpy.nan)
+                self._dx.fill(0)
+            else:
+                self.state.start_update()
             self._updates += 1
+            self._removed.clear()
             return collisions + [Tick(self)]
 
         if isinstance(event, AddListener):
@@ -141,31 +359,160 @@ class Environment:
             return None
 
         if isinstance(event, RemoveListener):
-            if event.listener in self.objects:
-                self.objects.remove(event.listener)
-                remove_by_identity(self.moveables, event.listener)
-                remove_by_identity(self.bodies, event.listener)
-            return None
+            return self.remove_many([event.listener])
 
         if isinstance(event, Move) and isinstance(event.sender, Body):
             return self.handle_move(event)
 
         raise RuntimeError(f"Unhandeled event: {event}")
 
+    def repair_order(self):
+        """Restore order of bodies and moveables by position after moves. Moves rarely reorder
+        bodies (overtakes, wraparound on a circle), so only local inversions are repaired.
+        """
+        if self.state is None:
+            changed = _repair_order(self.bodies)
+        else:
+            changed = self.state.sort()
+            if changed:
+                self.bodies[:] = self.state.bodies
+        if changed:
+            self._index = None
+        _repair_order(self.moveables)
+
+    def index_of(self, body: Body) -> int | None:
+        """Index of body in bodies, None if it is not registered.
+        """
+        index = self._index
+        if index is None:
+            index = self._index = {id(b): i for i, b in enumerate(self.bodies)}
+        return index.get(id(body))
+
+    def next_of(self, body: Body) -> Body | None:
+        """Next body in order of positions. On a line the last body has no next one.
+        """
+        return next_in(self.bodies, self.index_of(body))
+
+    def prev_of(self, body: Body) -> Body | None:
+        """Previous body in order of positions. On a line the first body has no previous one.
+        """
+        return prev_in(self.bodies, self.index_of(body))
+
+    def _accept_batch(self, events):
+        # Events of a batch are of the same type.
+        if isinstance(events[0], RemoveListener):
+            return self.remove_many([event.listener for event in events])
+        # Batches are delivered in order of their first events, so moves of a wave may come after removals
+        # of their senders. Those moves are dropped, as moves of removed senders always were.
+        if self._removed:
+            events = [move for move in events if move.sender not in self._removed]
+        return self.handle_moves(events)
+
+    def remove_many(self, listeners: list[Listener]):
+        """Forget removed listeners: all removals of a wave are compacted in one pass over moveables
+        and bodies, caches of neighbours are invalidated once. Not added listeners are ignored.
+        """
+        # Identity of removed object to the object.
+        removed = dict[int, Object]()
+        for listener in listeners:
+            if listener in self.objects:
+                self.objects.remove(listener)
+                self._removed.add(listener)
+                removed[id(listener)] = listener
+        if not removed:
+            return
+
+        self.moveables = [moveable for moveable in self.moveables if id(moveable) not in removed]
+        if self.state is not None:
+            self.state.remove_many([body._row for body in removed.values() if isinstance(body, Body) and body._state is self.state])
+            self.bodies[:] = self.state.bodies
+        else:
+            keep = [i for i, body in enumerate(self.bodies) if id(body) not in removed]
+            if len(keep) < len(self.bodies):
+                self.bodies = [self.bodies[i] for i in keep]
+                self._x0 = self._x0[keep]
+                self._dx = self._dx[keep]
+        self._index = None
+
+    def handle_moves(self, moves: list[Move]) -> list[Event] | None:
+        """Apply all moves made during a tick in one pass.
+        """
+        if self.state is not None:
+            return self._handle_moves_arrays(moves)
+
+        for move in moves:
+            if not isinstance(move.sender, Body):
+                raise RuntimeError(f"Unhandeled event: {move}")
+            self._move(move.sender, move.dx)
+
+    def _move(self, body: Body, dx: float):
+        """Record displacement and shift location in place, no objects are allocated.
+        """
+        i = self.index_of(body)
+        if i is None:
+            raise RuntimeError(f"Unregistered body moved: {body}")
+        if dx < 0:
+            raise RuntimeError(f"Expected dx >= 0 (dx = {dx})")
+        location = body.location
+        self._x0[i] = location.x()
+        self._dx[i] = dx
+        location.shift(dx)
+
+    def _handle_moves_arrays(self, moves: list[Move]):
+        state = self.state
+        rows = numpy.empty(len(moves), dtype=numpy.intp)
+        dx = numpy.empty(len(moves))
+        for i, move in enumerate(moves):
+            body = move.sender
+            if not isinstance(body, Body):
+                raise RuntimeError(f"Unhandeled event: {move}")
+            if body._state is not state:
+                raise RuntimeError(f"Unregistered body moved: {body}")
+            rows[i] = body._row
+            dx[i] = move.dx
+        if (dx < 0).any():
+            raise RuntimeError(f"Expected dx >= 0 (dx = {dx.min()})")
+        state.move(rows, dx)
+
     def handle_move(self, move: Move) -> Event | None:
-        if move.sender not in self.bodies:
-            raise RuntimeError(f"Unregistered body moved: {move.sender}")
-        self._moves[move.sender] = Path(move.sender.location, move.dx)
-        move.sender.location = move.sender.location.moved(move.dx)
+        if self.state is not None:
+            return self._handle_moves_arrays([move])
+        self._move(move.sender, move.dx)
 
     def detect_collision(self) -> list[Collision]:
-        collisions = []
         N = len(self.bodies)
         if N < 2:
             return []
 
+        if self.state is not None:
+            x, dx, space = self.state.x0, self.state.dx, self.state.space
+        else:
+            space = self.bodies[0].location.space
+            if not all(same_space(space, b.location.space) for b in self.bodies):
+                return self._detect_collision_paths()
+
+            x, dx = self._start_positions(), self._dx
+
+        bodies = self.bodies
+        return [Collision(bodies[i], bodies[(i + 1) % N], time=self.time) for i in collisions(space, x, dx).tolist()]
+
+    def _start_positions(self) -> numpy.ndarray:
+        """Fill start positions of bodies, which have not moved during the current update.
+        """
+        x = self._x0
+        for i in numpy.flatnonzero(numpy.isnan(x)).tolist():
+            x[i] = self.bodies[i].location.x()
+        return x
+
+    def _detect_collision_paths(self) -> list[Collision]:
+        """Check each body's path against the next one, for bodies in different spaces.
+        """
+        collisions = []
+        N = len(self.bodies)
+        x, dx = self._start_positions(), self._dx
+
         def get_path(i) -> Path:
-            return self._moves.setdefault(self.bodies[i], Path(self.bodies[i].location, 0))
+            return Path(self.bodies[i].location.at(x[i]), dx[i])
 
         current_path = get_path(0)
         for i in range(N):
@@ -177,3 +524,61 @@ class Environment:
             current_path = next_path
 
         return collisions
+
+
+def next_in(bodies: list[Body], i: int | None) -> Body | None:
+    """Body next to i-th of bodies ordered by positions. On a line the last body has no next one.
+    """
+    if i is None or len(bodies) < 2:
+        return None
+    body, candidate = bodies[i], bodies[(i + 1) % len(bodies)]
+    if body.location.distance(candidate.location) < 0:
+        return None
+    return candidate
+
+
+def prev_in(bodies: list[Body], i: int | None) -> Body | None:
+    """Body previous to i-th of bodies ordered by positions. On a line the first body has no previous one.
+    """
+    if i is None or len(bodies) < 2:
+        return None
+    body, candidate = bodies[i], bodies[i - 1]
+    if candidate.location.distance(body.location) < 0:
+        return None
+    return candidate
+
+
+def _position(moveable: Moveable) -> float:
+    return moveable.location.x()
+
+
+def _merge(items: list[Moveable], new: list[Moveable], insert: Callable[[Moveable], None]) -> list[int] | None:
+    """Add new items in order of positions, as if inserted one by one after equal positions. If items are
+    ordered, returns the order of items + new to take, else inserts new ones by insert(item) and returns None.
+    Items are out of order between moves and the next update, inserting keeps their order for collision detection.
+    """
+    keys = [_position(item) for item in items]
+    if all(a <= b for a, b in zip(keys, keys[1:])):
+        # Stable sort, O((N + M) log(N + M)): existing items go before new ones at equal positions.
+        keys += [_position(item) for item in new]
+        return sorted(range(len(keys)), key=keys.__getitem__)
+    for item in new:
+        insert(item)
+    return None
+
+
+def _repair_order(items: list[Moveable]) -> bool:
+    """Stable insertion sort by position, which is linear for nearly sorted items.
+    Out of order items are moved to their place found by binary search.
+    """
+    keys = [item.location.x() for item in items]
+    changed = False
+    for i in range(1, len(keys)):
+        key = keys[i]
+        if key < keys[i - 1]:
+            j = bisect_right(keys, key, 0, i)
+            del keys[i]
+            keys.insert(j, key)
+            items.insert(j, items.pop(i))
+            changed = True
+    return changed
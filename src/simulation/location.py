@@ -1,6 +1,7 @@
 
 from math import ceil, floor
 from helpers import not_implemented
+import numpy
 
 
 class Space:
@@ -8,6 +9,7 @@ class Space:
 
 
 class Location:
+    __slots__ = ('space',)
 
     def __init__(self, space: Space):
         self.space = space
@@ -16,6 +18,21 @@ class Location:
     def moved(self, dx: float) -> 'Location':
         pass
 
+    @not_implemented
+    def at(self, x: float) -> 'Location':
+        """New location in the same space at x."""
+        pass
+
+    @not_implemented
+    def shift(self, dx: float):
+        """Move in place by dx, same as moved but without allocation.
+        Locations may be shared, so only shift locations you own, see copy.
+        """
+        pass
+
+    def copy(self) -> 'Location':
+        return self.at(self.x())
+
     @not_implemented
     def x(self) -> float:
         pass
@@ -41,6 +58,7 @@ class Location:
         return f"Location({self.space}: {self.x()})"
 
 class Path:
+    __slots__ = ('_a', '_b', '_dx')
 
     def __init__(self, a: Location, dx: float):
         if (dx < 0):
@@ -83,15 +101,27 @@ class LineSpace:
     def __str__(self):
         return 'LineSpace()'
 
+
+# Line space has no parameters, all lines share it.
+LINE_SPACE = LineSpace()
+
+
 class Line(Location):
+    __slots__ = ('_x',)
 
     def __init__(self, x: float = 0):
-        super().__init__(LineSpace())
+        super().__init__(LINE_SPACE)
         self._x = x
 
     def moved(self, dx):
         return Line(self._x + dx)
 
+    def at(self, x: float) -> 'Line':
+        return Line(x)
+
+    def shift(self, dx: float):
+        self._x += dx
+
     def x(self) -> float:
         return self._x
 
@@ -105,6 +135,7 @@ class Line(Location):
 
 
 class CircleSpace:
+    __slots__ = ('_length',)
 
     def __init__(self, length: float):
         self._length = length
@@ -117,18 +148,27 @@ class CircleSpace:
 
 
 class Circle(Location):
+    __slots__ = ('_x',)
 
     def __init__(self, space: CircleSpace, x: float = 0):
         super().__init__(space)
+        self._x = self._wrap(x)
 
+    def _wrap(self, x: float) -> float:
+        length = self.space.length()
         if x >= 0:
-            self._x = x - space.length() * floor(x / space.length())
-        else:
-            self._x = x + space.length() * ceil(-x / space.length())
+            return x - length * floor(x / length)
+        return x + length * ceil(-x / length)
 
     def moved(self, dx: float):
         return Circle(self.space, self._x + dx)
 
+    def at(self, x: float) -> 'Circle':
+        return Circle(self.space, x)
+
+    def shift(self, dx: float):
+        self._x = self._wrap(self._x + dx)
+
     def x(self) -> float:
         return self._x
 
@@ -150,3 +190,42 @@ class Circle(Location):
         if dx < 0:
             dx += self.space.length()
         return dx
+
+
+def same_space(a: Space, b: Space) -> bool:
+    """Whether locations in spaces a and b are comparable.
+    """
+    if isinstance(a, CircleSpace):
+        return isinstance(b, CircleSpace) and a.length() == b.length()
+    return type(a) is type(b)
+
+
+def collisions(space: LineSpace | CircleSpace, x: numpy.ndarray, dx: numpy.ndarray) -> numpy.ndarray:
+    """Vectorized collides of each point with the next one and of the last point with the first one.
+    Same arithmetic as Line.collides and Circle.collides.
+
+    Args:
+        space (LineSpace | CircleSpace): Space of all points.
+        x (numpy.ndarray): Start positions, in order.
+        dx (numpy.ndarray): Transitions.
+
+    Returns:
+        numpy.ndarray: Indices i, such that i-th point collides (i + 1) % N-th.
+    """
+    return numpy.flatnonzero(collides(space, x, dx, numpy.roll(x, -1), numpy.roll(dx, -1)))
+
+
+def collides(space: LineSpace | CircleSpace, x: numpy.ndarray, dx: numpy.ndarray,
+             other_x: numpy.ndarray, other_dx: numpy.ndarray) -> numpy.ndarray:
+    """Elementwise collides of points with other points, arrays of any shape.
+    Same arithmetic as Line.collides and Circle.collides.
+    """
+    if isinstance(space, CircleSpace):
+        same = (x == other_x) & (dx == other_dx)
+        x = numpy.where(x >= other_x, x - space.length(), x)
+        return same | (x + dx >= other_x + other_dx)
+    if isinstance(space, LineSpace):
+        s = x - other_x
+        e = x + dx - (other_x + other_dx)
+        return ((s < 0) & (e > 0)) | ((e == 0) & (s <= 0))
+    raise RuntimeError(f"Unknown space {space}")
@@ -0,0 +1,87 @@
+from math import atan, atanh, cos, log, log1p, sinh, cosh, sqrt, tan, tanh
+from simulation.math.rk2a import rk2a_motion
+from typing import Callable
+
+# Single step of motion x'' = force(t, x, v) / mass from t = 0, x = 0, v = v0:
+# integrator(force, mass, v0, h) -> (distance, speed).
+Integrator = Callable[[Callable[[float, float, float], float], float, float, float], tuple[float, float]]
+
+
+def euler(force, mass: float, v0: float, h: float) -> tuple[float, float]:
+    """Explicit Euler, first order."""
+    return h * v0, v0 + h * (force(0, 0.0, v0) / mass)
+
+
+def semi_implicit_euler(force, mass: float, v0: float, h: float) -> tuple[float, float]:
+    """Semi-implicit Euler: speed is updated first and moves the body. First order, but stable."""
+    v = v0 + h * (force(0, 0.0, v0) / mass)
+    return h * v, v
+
+
+def rk4(force, mass: float, v0: float, h: float) -> tuple[float, float]:
+    """Classic fourth order Runge-Kutta."""
+    half = h / 2.0
+    a1 = force(0, 0.0, v0) / mass
+    v2 = v0 + half * a1
+    a2 = force(half, half * v0, v2) / mass
+    v3 = v0 + half * a2
+    a3 = force(half, half * v2, v3) / mass
+    v4 = v0 + h * a3
+    a4 = force(h, h * v3, v4) / mass
+    return h / 6.0 * (v0 + 2 * v2 + 2 * v3 + v4), v0 + h / 6.0 * (a1 + 2 * a2 + 2 * a3 + a4)
+
+
+def exact(force, mass: float, v0: float, h: float) -> tuple[float, float]:
+    """Closed form for forces depending only on speed as a - b * v**2, b > 0, which declare
+    their coefficients by quadratic() -> (a, b), like Car forces. Other forces fall back to rk4.
+    A body decelerating to zero speed within the step stops.
+    """
+    quadratic = getattr(force, 'quadratic', None)
+    if quadratic is None:
+        return rk4(force, mass, v0, h)
+
+    a, b = quadratic()
+    k = b / mass
+    if a > 0:
+        s = sqrt(a / b)
+        r = k * s
+        # Ratios are checked, not speeds: atanh(1) is undefined.
+        if v0 / s < 1:
+            phi = atanh(v0 / s)
+            return log(cosh(r * h + phi) / cosh(phi)) / k, s * tanh(r * h + phi)
+        if s / v0 < 1:
+            phi = atanh(s / v0)
+            return log(sinh(r * h + phi) / sinh(phi)) / k, s / tanh(r * h + phi)
+        return s * h, s
+
+    if a < 0:
+        c = sqrt(-a / b)
+        r = k * c
+        phi = atan(v0 / c)
+        if r * h >= phi:
+            # Stops within the step.
+            return -log(cos(phi)) / k, 0.0
+        return log(cos(phi - r * h) / cos(phi)) / k, c * tan(phi - r * h)
+
+    return log1p(k * v0 * h) / k, v0 / (1 + k * v0 * h)
+
+
+INTEGRATORS = dict[str, Integrator](
+    euler=euler,
+    semi_implicit_euler=semi_implicit_euler,
+    rk2=rk2a_motion,
+    rk4=rk4,
+    exact=exact,
+)
+"""Integrators by name, see Environment integrator."""
+
+
+def integrator(integrator: str | Integrator) -> Integrator:
+    """Integrator by name from INTEGRATORS, callables are returned as is.
+    """
+    if callable(integrator):
+        return integrator
+    found = INTEGRATORS.get(integrator)
+    if found is None:
+        raise ValueError(f"Unknown integrator '{integrator}', expected one of {', '.join(INTEGRATORS)}")
+    return found
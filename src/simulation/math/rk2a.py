@@ -39,3 +39,20 @@ def rk2a(f, x0, t):
         x[i+1] = x[i] + h * f(x[i] + k1, t[i] + h / 2.0)
 
     return x
+
+
+def rk2a_motion(force, mass: float, v0: float, h: float) -> tuple[float, float]:
+    """Single rk2a step of motion x'' = force(t, x, v) / mass from t = 0, x = 0, v = v0 with scalars only.
+    Same arithmetic, so the same result, as
+
+        rk2a(lambda xv, t: numpy.asarray([xv[1], force(t, xv[0], xv[1]) / mass]), [0, v0], [0, h])[-1]
+
+    but without arrays and closures, which cost much more than the step itself.
+
+    Returns:
+        tuple[float, float]: Distance and speed after h.
+    """
+    k1x = h * v0 / 2.0
+    k1v = h * (force(0, 0.0, v0) / mass) / 2.0
+    v = v0 + k1v
+    return 0.0 + h * v, v0 + h * (force(h / 2.0, 0.0 + k1x, v) / mass)
@@ -3,6 +3,8 @@ from eventloop import Event
 
 
 class Move(Event):
+    __slots__ = ('dx',)
+
     def __init__(self, dx: float):
         self.dx = dx
     
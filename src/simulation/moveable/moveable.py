@@ -4,10 +4,27 @@ from simulation.moveable.events import Move
 
 
 class Moveable(Object):
+    # Stored as _location, so subclasses may override the location property without a dead slot, see Body.
+    __slots__ = ('_location',)
+
     def __init__(self, location: Location, name: str = None):
         super().__init__(name=name)
         self.location = location
 
+    @property
+    def location(self) -> Location:
+        return self._location
+
+    @location.setter
+    def location(self, location: Location):
+        self._location = location
+
+    def snapshot(self):
+        return self.location.copy()
+
+    def restore(self, state):
+        self.location = state.copy()
+
     def move(self, dx: float) -> Move:
         return Move(dx)
     
@@ -3,5 +3,13 @@ from eventloop import Listener
 
 
 class Object(Listener):
+    __slots__ = ('name', 'environment')
+
     def __init__(self, name: str = None):
         self.name = name
+        self.environment = None
+
+    def input_events(self) -> set:
+        """Objects are passive unless they declare accepted events.
+        """
+        return set()
@@ -0,0 +1,197 @@
+import numpy
+
+from simulation.location import Location, Line, Circle, CircleSpace, same_space
+
+
+class State:
+    """Array-backed state of bodies: structure of arrays with rows aligned to Environment.bodies.
+    Bound bodies are views over their rows, see Body.bind.
+
+    All bodies must share the same space: a line or circles of the same length.
+    """
+
+    COLUMNS = 'x', 'v', 'mass', 'x0', 'dx'
+
+    def __init__(self):
+        self.x = numpy.empty(0)
+        """Positions."""
+        self.v = numpy.empty(0)
+        """Speeds."""
+        self.mass = numpy.empty(0)
+        """Masses."""
+        self.x0 = numpy.empty(0)
+        """Positions at the start of the current update."""
+        self.dx = numpy.empty(0)
+        """Distances moved during the current update."""
+        self.space = None
+        self.bodies = []
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def length(self) -> float | None:
+        """Circle length or None for line."""
+        return self.space.length() if isinstance(self.space, CircleSpace) else None
+
+    def insert(self, index: int, body):
+        """Bind body to a new row at index.
+        """
+        location = body.location
+        if self.space is None:
+            self.space = location.space
+        elif not same_space(self.space, location.space):
+            raise RuntimeError(f"Expected all bodies in {self.space} (got {location.space})")
+
+        values = {'x': location.x(), 'v': body.v, 'mass': body.mass, 'x0': location.x(), 'dx': 0}
+        for column in State.COLUMNS:
+            setattr(self, column, numpy.insert(getattr(self, column), index, values[column]))
+
+        self.bodies.insert(index, body)
+        body.bind(self, index)
+        for row in range(index + 1, len(self.bodies)):
+            self.bodies[row]._row = row
+
+    def insert_many(self, bodies: list):
+        """Bind bodies to new rows in order of positions, as insert at searchsorted positions one by one would.
+        Rows are reordered by one stable sort, if existing rows are sorted.
+        """
+        x = self.x
+        if (x[1:] < x[:-1]).any():
+            for body in bodies:
+                self.insert(int(numpy.searchsorted(self.x, body.location.x(), side='right')), body)
+            return
+
+        values = {column: numpy.empty(len(bodies)) for column in State.COLUMNS}
+        for i, body in enumerate(bodies):
+            location = body.location
+            if self.space is None:
+                self.space = location.space
+            elif not same_space(self.space, location.space):
+                raise RuntimeError(f"Expected all bodies in {self.space} (got {location.space})")
+            values['x'][i] = values['x0'][i] = location.x()
+            values['v'][i] = body.v
+            values['mass'][i] = body.mass
+        values['dx'][:] = 0
+
+        # Stable: new rows go after existing ones at equal positions, in order of bodies.
+        order = numpy.argsort(numpy.concatenate([x, values['x']]), kind='stable')
+        for column in State.COLUMNS:
+            setattr(self, column, numpy.concatenate([getattr(self, column), values[column]])[order])
+        existing = len(self.bodies)
+        self.bodies = [self.bodies[i] if i < existing else bodies[i - existing] for i in order.tolist()]
+        for row, body in enumerate(self.bodies):
+            if body._state is self:
+                body._row = row
+            else:
+                body.bind(self, row)
+
+    def remove(self, index: int):
+        """Unbind body at index and drop its row.
+        """
+        body = self.bodies.pop(index)
+        body.unbind()
+        for column in State.COLUMNS:
+            setattr(self, column, numpy.delete(getattr(self, column), index))
+        for row in range(index, len(self.bodies)):
+            self.bodies[row]._row = row
+
+    def remove_many(self, indices: list[int]):
+        """Unbind bodies at indices and drop their rows in one pass.
+        """
+        if not indices:
+            return
+        dropped = set(indices)
+        for index in dropped:
+            self.bodies[index].unbind()
+        for column in State.COLUMNS:
+            setattr(self, column, numpy.delete(getattr(self, column), list(dropped)))
+        self.bodies = [body for row, body in enumerate(self.bodies) if row not in dropped]
+        for row in range(min(dropped), len(self.bodies)):
+            self.bodies[row]._row = row
+
+    def sort(self) -> bool:
+        """Stable sort of rows by position. Returns whether order changed.
+        Checking sorted rows is a single vectorized pass.
+        """
+        x = self.x
+        if not (x[1:] < x[:-1]).any():
+            return False
+        order = numpy.argsort(x, kind='stable')
+        for column in State.COLUMNS:
+            setattr(self, column, getattr(self, column)[order])
+        self.bodies = [self.bodies[i] for i in order]
+        for row, body in enumerate(self.bodies):
+            body._row = row
+        return True
+
+    def snapshot(self) -> tuple:
+        return self.space, list(self.bodies), [getattr(self, column).copy() for column in State.COLUMNS]
+
+    def restore(self, snapshot: tuple):
+        """Bring back rows of the snapshot. Bodies bound since the snapshot are unbound,
+        unbound ones are bound again.
+        """
+        space, bodies, columns = snapshot
+        kept = {id(body) for body in bodies}
+        for body in self.bodies:
+            if id(body) not in kept:
+                body.unbind()
+
+        self.space = space
+        for column, values in zip(State.COLUMNS, columns):
+            setattr(self, column, values.copy())
+        self.bodies = list(bodies)
+        for row, body in enumerate(self.bodies):
+            if body._state is self:
+                body._row = row
+            else:
+                body.bind(self, row)
+
+    def start_update(self):
+        self.x0[:] = self.x
+        self.dx[:] = 0
+
+    def move(self, rows: numpy.ndarray, dx: numpy.ndarray):
+        """Move bodies at rows by dx.
+        """
+        self.dx[rows] = dx
+        x = self.x[rows] + dx
+        length = self.length()
+        if length is not None:
+            # Same arithmetic as Circle, dx is non-negative.
+            x = x - length * numpy.floor(x / length)
+        self.x[rows] = x
+
+    def location(self, x: float) -> Location:
+        """Unbound location at x in the space of bodies.
+        """
+        if isinstance(self.space, CircleSpace):
+            return Circle(self.space, x)
+        return Line(x)
+
+
+_views = dict[type, type]()
+
+
+def view(location: Location, body) -> Location:
+    """Location of the same class, which position is the row of the bound body.
+    """
+    cls = type(location)
+    view_class = _views.get(cls)
+    if view_class is None:
+        view_class = _views[cls] = type(cls.__name__, (cls,), {
+            '__slots__': ('_body',),
+            '__init__': _view_init,
+            '_x': property(_view_x),
+        })
+    return view_class(location.space, body)
+
+
+def _view_init(self, space, body):
+    self.space = space
+    self._body = body
+
+
+def _view_x(self) -> float:
+    body = self._body
+    return float(body._state.x[body._row])
@@ -22,6 +22,9 @@ class Timer(Listener):
         self.kwargs = kwargs
         self.time_source = time_source
         self.trigger_event = trigger_event
+        self._start = None
+        self._active = False
+        self._when = None
 
     def start(self):
         self._start = self.time_source()
@@ -29,6 +32,12 @@ class Timer(Listener):
         self._set_when(self._start)
         
 
+    def snapshot(self):
+        return self._start, self._active, self._when
+
+    def restore(self, state):
+        self._start, self._active, self._when = state
+
     def input_events(self):
         return self.trigger_event
 
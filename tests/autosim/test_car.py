@@ -0,0 +1,119 @@
+from autosim.car import ACar, Car, specs
+from autosim.car.car import Constants, Force, Friction, accelerate_many, constants
+from simulation import Environment
+from simulation.location import Circle, CircleSpace, Line
+from simulation.math.rk2a import rk2a_motion
+import numpy
+import pytest
+
+
+def test_constants_are_computed_once_per_spec():
+    assert ACar('0').constants is ACar('1', spec=specs.TEST).constants
+    assert ACar('0').constants is not ACar('0', spec=specs.LADA_GRANTA).constants
+    assert constants(specs.TEST, 0.015, 1.25).thrust == specs.TEST.thrust
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_accelerate_many_matches_accelerate(seed):
+    rng = numpy.random.default_rng(seed)
+    cars = [ACar('0', spec=spec) for spec in rng.choice([specs.TEST, specs.LADA_GRANTA], 100)]
+    u = numpy.concatenate([[-1, 0, 1], rng.uniform(-1, 1, 97)])
+    v = rng.uniform(0, 40, 100)
+    for car, speed in zip(cars, v):
+        car.v = float(speed)
+    columns = [numpy.array([getattr(car.constants, name) for car in cars]) for name in Constants._fields]
+    dx, w = accelerate_many(u, v, numpy.array([car.mass for car in cars]), *columns, 0.1)
+
+    for i, car in enumerate(cars):
+        move = car.accelerate(float(u[i]), 0.1)
+        # Bit for bit.
+        assert (move.dx, car.v) == (dx[i], w[i])
+
+
+def reference_force(car: Car, u: float):
+    """Force of a car as Car.get_force computed it before constants were factored out."""
+    d_pos = u if u > 0 else 0
+    d_neg = -u if u < 0 else 0
+
+    def force(t, x, v):
+        F_thrust = d_pos * car.spec.thrust
+        F_frict = car.f * (1 + (v**2) / 1500) * car.N
+        F_break = d_neg * car.spec.mbreak * car.N * car.f / Friction.ASPHALT
+        F_air = car.spec.front_area * car.spec.streamlining * car.AIR_DENSITY * (v**2)
+        return F_thrust - F_frict - F_break - F_air
+    return force
+
+
+@pytest.mark.parametrize('spec', [specs.TEST, specs.LADA_GRANTA])
+@pytest.mark.parametrize('f', [Friction.ASPHALT, Friction.GROUND])
+def test_force_matches_reference(spec, f):
+    rng = numpy.random.default_rng(0)
+    car = ACar('0', spec=spec, f=f)
+    for u, v in zip(rng.uniform(-1, 1, 200).tolist(), rng.uniform(0, 60, 200).tolist()):
+        # Bit for bit.
+        assert Force(car, u)(0, 0, v) == reference_force(car, u)(0, 0, v)
+
+
+def simulate(integrator, arrays: bool) -> list[tuple[str, float, float]]:
+    space = CircleSpace(400)
+    cars = [ACar(function, location=Circle(space, 20 * i), spec=spec, name=str(i))
+            for i, (function, spec) in enumerate(zip(['1', '0.6', '-0.5', '0.8 - 0.05 * t', '1', '0.4'] * 3,
+                                                     [specs.TEST, specs.LADA_GRANTA] * 9))]
+    environment = Environment(arrays=arrays, integrator=integrator)
+    environment.subscribe(*cars)
+    for _ in range(500):
+        environment.iterate()
+    return [(car.name, car.location.x(), car.v) for car in environment.bodies]
+
+
+@pytest.mark.parametrize('arrays', [False, True])
+def test_batched_pushes_match_single_pushes(arrays):
+    # Any integrator, but rk2a_motion itself, pushes cars one by one.
+    single = simulate(lambda *args: rk2a_motion(*args), arrays)
+    batched = simulate('rk2', arrays)
+    # Some cars collided and were removed.
+    assert 0 < len(batched) < 18
+    assert batched == single
+
+
+def drive(tabulated: bool, integrator='rk2') -> tuple[ACar, Environment, list[tuple[float, float]]]:
+    environment = Environment(integrator=integrator)
+    car = ACar('0.3 + 0.7 * sin(t)', location=Line(10))
+    if tabulated:
+        car.tabulate(timeout=5, dt=environment.dt)
+    environment.subscribe(car)
+    states = []
+    for i in range(400):
+        if i == 200:
+            # Off the trajectory.
+            car.v = 5
+        environment.iterate()
+        states.append((car.location.x(), car.v))
+    return car, environment, states
+
+
+def test_replayed_trajectory_matches_integrated():
+    _, _, integrated = drive(tabulated=False)
+    car, environment, replayed = drive(tabulated=True)
+    assert replayed == integrated
+    assert car._on_trajectory(environment) is None
+
+
+def test_trajectory_is_replayed(monkeypatch):
+    pushes = []
+    monkeypatch.setattr(ACar, 'accelerate_in', lambda self, environment: pushes.append(environment.time) or Car.accelerate_in(self, environment))
+    drive(tabulated=True)
+    # After speed was changed only.
+    assert len(pushes) == 200
+    pushes.clear()
+    drive(tabulated=True, integrator='rk4')
+    assert len(pushes) == 400
+
+
+def test_trajectories_are_cached():
+    cars = [ACar('0.5', location=Line(x)) for x in (0, 100)] + [ACar('0.5', spec=specs.LADA_GRANTA)]
+    for car in cars:
+        car.tabulate(timeout=1, dt=0.01)
+    assert cars[0]._trajectory is cars[1]._trajectory
+    assert cars[0]._trajectory is not cars[2]._trajectory
+    assert ACar('0.5', mode=ACar.Mode.MOVEMENT)._trajectory is None
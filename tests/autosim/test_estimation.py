@@ -0,0 +1,18 @@
+from autosim import EstimationStrategy, Criteria, ReferenceCriteria, SimulationParameters, batch_fitness, fitness
+from autosim.car import ACar
+from simulation.location import Line
+import pytest
+
+
+@pytest.fixture
+def strategy():
+    return EstimationStrategy(collision=Criteria(1000), speed=ReferenceCriteria(1, 15), distance=ReferenceCriteria(1, 30))
+
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize('arrays', [False, True])
+def test_collision_tick_fine(strategy, arrays):
+    # The target overtakes the trainer on the collision tick, its front wraps to the trainer behind.
+    parameters = SimulationParameters(timeout=20, objects=[ACar('0.3', location=Line(30), name='trainer')], arrays=arrays)
+    assert fitness(ACar('1'), parameters, strategy) == 0.0008960844646517947
+    assert batch_fitness([ACar('1')], parameters, strategy) == [0.0008960844646517947]
@@ -0,0 +1,64 @@
+from autosim import SimulationParameters
+from autosim.car import ACar
+from autosim.car.expression import evaluator, tabulate, vectorize
+from autosim.simulation import Simulation
+import numpy
+import pytest
+
+
+def values(expression: str) -> tuple[numpy.ndarray, list[float]]:
+    """Vectorized values and values of cexprtk."""
+    t = numpy.arange(100) * 0.37
+    f = evaluator(expression)
+    with numpy.errstate(all='ignore'):
+        return vectorize(expression)(t, 0.01), [f(time, 0.01) for time in t.tolist()]
+
+
+@pytest.mark.parametrize('expression', ['0.5', '-t^2', '2^3^2', '1/0', '-7 % 3', 't % 0.3', '(-8)^(1/3)', 'min(t, 0.5, 1 - t)',
+                                        'max(0, 1 - dt * t)', 'pi * t', '1 - 2 * 3 / 4 + t * t - t / 3'])
+def test_vectorize_arithmetic_matches_cexprtk(expression):
+    vectorized, expected = values(expression)
+    # Bit for bit.
+    assert numpy.array_equal(vectorized, expected, equal_nan=True)
+
+
+@pytest.mark.parametrize('expression', ['sin(T) + 0.1 * dt', 'exp(-t) * log(1 + t)', 'sqrt(t) * cos(pi * t)', 'tan(t / 100)'])
+def test_vectorize_functions_match_cexprtk(expression):
+    vectorized, expected = values(expression)
+    # Implementations of functions may differ in the last bits.
+    assert vectorized == pytest.approx(expected, rel=1e-14, abs=1e-300)
+
+
+@pytest.mark.parametrize('expression', ['2t', 't > 1', 'if(t < 1, 1, 0)', 'x', 'sin(t, 1) + abs()', '__import__("os")'])
+def test_unsupported_syntax_is_left_to_cexprtk(expression):
+    assert vectorize(expression) is None
+
+
+def test_tabulate():
+    table = tabulate('2t', 0.01, 1000)
+    assert table.tolist() == [2 * i * 0.01 for i in range(1000)]
+    assert not table.flags.writeable
+    # Cached by expression and grid.
+    assert tabulate('2t', 0.01, 1000) is table
+    assert tabulate('2t', 0.02, 1000) is not table
+
+
+def test_car_reads_table():
+    car = ACar('0.1 * t', name='trainer')
+    car.tabulate(timeout=1, dt=0.01)
+    assert car.value(0.5, 0.01) == car.function(0.5, 0.01)
+    assert car.value(37 * 0.01, 0.01) == 37 * 0.01 * 0.1
+    # Off the grid.
+    car._table = numpy.zeros(200)
+    assert car.value(0.005, 0.01) == car.function(0.005, 0.01)
+    assert car.value(0.5, 0.02) == car.function(0.5, 0.02)
+    assert car.value(5, 0.01) == car.function(5, 0.01)
+    assert car.value(0.5, 0.01) == 0
+
+
+def test_simulation_tabulates_cars():
+    cars = [ACar('0.5'), ACar('0.5'), ACar(lambda t, dt: 0.5)]
+    Simulation(SimulationParameters(timeout=1, objects=cars)).environment()
+    assert cars[0]._table is cars[1]._table
+    assert len(cars[0]._table) >= 101
+    assert cars[2]._table is None
@@ -0,0 +1,50 @@
+from autosim import EstimationStrategy, Criteria, ReferenceCriteria, SimulationParameters, Fork, batch_fitness, fitness, fork_fitness
+from autosim.car import ACar
+from simulation.location import Line
+import pytest
+
+
+@pytest.fixture
+def strategy():
+    return EstimationStrategy(collision=Criteria(1000), speed=ReferenceCriteria(1, 15), distance=ReferenceCriteria(1, 30))
+
+
+@pytest.fixture
+def parameters():
+    return SimulationParameters(timeout=5, objects=[ACar('0.3', location=Line(50), name='trainer')])
+
+
+@pytest.mark.timeout(10)
+def test_fork_fitness_matches_fitness(strategy, parameters):
+    functions = ['0.5', '1', '0.1 * t']
+    expected = [fitness(ACar(f), parameters, strategy) for f in functions]
+    fork = Fork(parameters)
+    # Twice, to check the fork is restored after each simulation.
+    assert [fork_fitness(ACar(f), fork, strategy) for f in functions * 2] == expected * 2
+
+
+@pytest.mark.timeout(10)
+def test_fork_warmup(parameters):
+    fork = Fork(parameters, warmup=1)
+    assert fork.environment.time == pytest.approx(0.99)
+    trainer = fork.environment.bodies[0]
+    x = trainer.location.x()
+
+    fork.simulate(ACar('1'))
+    assert fork.environment.time == pytest.approx(5)
+    fork.simulate()
+    assert len(fork.environment.bodies) == 1
+
+    fork.environment.restore(fork._snapshot)
+    assert trainer.location.x() == x
+    # Parameters are not affected.
+    assert parameters.objects[0].location.x() == 50
+
+
+@pytest.mark.timeout(10)
+def test_batch_fitness_matches_fitness(strategy, parameters):
+    functions = ['0.5', '1', '0.1 * t', '-0.1']
+    expected = [fitness(ACar(f), parameters, strategy) for f in functions]
+    assert batch_fitness([ACar(f) for f in functions], parameters, strategy) == expected
+    # Parameters are not affected.
+    assert parameters.objects[0].location.x() == 50
@@ -1,6 +1,8 @@
-
+from eventloop import CallbackListener, EventLoop, Event, Listener
 from eventloop import EventLoop, Event, Listener
-from eventloop.events import Iteration, Terminate
+from eventloop.events import AddListener, Iteration, RemoveListener, Terminate
+import asyncio
+import threading
 import pytest
 
 
@@ -94,3 +96,485 @@ def test_terminate_immediate_wt(countdown, immediate, expected_count):
     loop.subscribe(terminator)
     loop.loop()
     assert watcher.count == expected_count
+
+
+class Ping(Event):
+    pass
+
+
+class Responder(Listener):
+    def __init__(self, response):
+        self.response = response
+
+    def input_events(self):
+        return {Iteration}
+
+    def accept(self, event):
+        return self.response()
+
+
+class Counter(Listener):
+    def __init__(self):
+        self.count = 0
+
+    def input_events(self):
+        return {Ping}
+
+    def accept(self, event):
+        assert isinstance(event, Ping)
+        self.count += 1
+
+
+@pytest.mark.timeout(0.1)
+@pytest.mark.parametrize('response,expected_count', [
+    (lambda: None,                  0),
+    (lambda: Ping(),                1),
+    (lambda: Ping,                  1),
+    (lambda: [Ping(), Ping],        2),
+    (lambda: (Ping(), Ping()),      2),
+    (lambda: {Ping()},              1),
+    (lambda: (Ping() for _ in range(3)), 3),
+])
+def test_responses(response, expected_count):
+    responder = Responder(response)
+    counter = Counter()
+    loop = EventLoop()
+    loop.subscribe(responder)
+    loop.subscribe(counter)
+    loop.subscribe(Terminator(1, False))
+    loop.loop()
+    assert counter.count == expected_count
+
+
+@pytest.mark.timeout(0.1)
+def test_unsubscribe_updates_dispatch():
+    counter = Counter()
+    loop = EventLoop()
+    loop.subscribe(counter)
+    loop.put(Ping())
+    loop.iterate()
+    assert counter.count == 1
+
+    loop.unsubscribe(counter)
+    loop.put(Ping())
+    loop.iterate()
+    assert counter.count == 1
+
+    loop.subscribe(counter)
+    loop.put(Ping())
+    loop.iterate()
+    assert counter.count == 2
+
+
+class Recorder(Listener):
+    def __init__(self):
+        self.events = []
+
+    def input_events(self):
+        return {Iteration, Ping}
+
+    def accept(self, event):
+        self.events.append(event)
+
+
+@pytest.mark.timeout(0.1)
+def test_iteration_event_reused_and_first():
+    recorder = Recorder()
+    loop = EventLoop()
+    loop.subscribe(recorder)
+    ping = Ping()
+    loop.put(ping)
+    loop.iterate()
+    loop.iterate()
+    assert recorder.events[1] is ping
+    assert isinstance(recorder.events[0], Iteration)
+    assert recorder.events[2] is recorder.events[0]
+
+
+class SubPing(Ping):
+    pass
+
+
+class Wildcard(Listener):
+    def __init__(self):
+        self.events = []
+
+    def input_events(self):
+        return None
+
+    def accept(self, event):
+        self.events.append(type(event))
+
+
+@pytest.mark.timeout(0.1)
+def test_subclass_dispatch():
+    counter = Counter()
+    loop = EventLoop()
+    loop.subscribe(counter)
+    loop.put(SubPing())
+    loop.iterate()
+    assert counter.count == 1
+
+
+@pytest.mark.timeout(0.1)
+def test_subclass_dispatch_order_and_cache():
+    order = []
+
+    class Named(Listener):
+        def __init__(self, name, events):
+            self.name = name
+            self.events = events
+
+        def input_events(self):
+            return self.events
+
+        def accept(self, event):
+            if isinstance(event, Ping):
+                order.append(self.name)
+
+    loop = EventLoop()
+    loop.subscribe(Named('sub', {SubPing}))
+    loop.subscribe(Named('base', {Ping}))
+    loop.subscribe(Named('both', {Ping, SubPing}))
+    loop.put(SubPing())
+    loop.iterate()
+    assert order == ['sub', 'base', 'both']
+
+    # Cached resolution is invalidated by a subscription to a base event.
+    order.clear()
+    loop.subscribe(Named('event', {Event}))
+    loop.put(SubPing())
+    loop.iterate()
+    assert order == ['sub', 'base', 'both', 'event']
+
+
+@pytest.mark.timeout(0.1)
+def test_wildcard():
+    wildcard = Wildcard()
+    loop = EventLoop()
+    loop.subscribe(wildcard)
+    loop.put(Ping())
+    loop.iterate()
+    assert wildcard.events == [Iteration, Ping]
+
+    loop.unsubscribe(wildcard)
+    loop.iterate()
+    assert wildcard.events == [Iteration, Ping]
+
+
+class Pinger(Listener):
+    def __init__(self, n):
+        self.n = n
+
+    def input_events(self):
+        return {Iteration}
+
+    def accept(self, event):
+        return [Ping() for _ in range(self.n)]
+
+
+class Batcher(Listener):
+    def __init__(self):
+        self.batches = []
+
+    def input_events(self):
+        return {Ping, Loopback}
+
+    def batch_events(self):
+        return {Ping}
+
+    def accept(self, event):
+        assert isinstance(event, Loopback)
+
+    def accept_batch(self, events):
+        self.batches.append(events)
+        return Loopback()
+
+
+@pytest.mark.timeout(0.1)
+def test_accept_batch():
+    batcher = Batcher()
+    counter = Counter()
+    loop = EventLoop()
+    loop.subscribe(Pinger(3))
+    loop.subscribe(Pinger(2))
+    loop.subscribe(batcher)
+    loop.subscribe(counter)
+    loop.subscribe(Terminator(2, False))
+    loop.loop()
+    assert counter.count == 10
+    assert [len(batch) for batch in batcher.batches] == [5, 5]
+
+
+@pytest.mark.timeout(0.1)
+def test_accept_batch_wildcard_subscribed_mid_wave():
+    wildcard = Wildcard()
+    batcher = Batcher()
+    loop = EventLoop()
+    loop.subscribe(CallbackListener(lambda e: [Ping(), AddListener(wildcard), Ping()], {Iteration}))
+    loop.subscribe(batcher)
+    loop.iterate()
+    # Dispatch is recompiled after the wildcard subscribes, the batch is not split.
+    assert [len(batch) for batch in batcher.batches] == [2]
+    assert Ping in wildcard.events
+
+
+@pytest.mark.timeout(0.1)
+def test_accept_batch_default():
+    class DefaultBatcher(Counter):
+        def batch_events(self):
+            return Ping
+
+    counter = DefaultBatcher()
+    loop = EventLoop()
+    loop.subscribe(Pinger(3))
+    loop.subscribe(counter)
+    loop.subscribe(Terminator(1, False))
+    loop.loop()
+    assert counter.count == 3
+
+
+@pytest.mark.timeout(0.1)
+def test_accept_batch_drops_unsubscribed_senders():
+    pinger = Pinger(2)
+
+    class Remover(Listener):
+        def input_events(self):
+            return {Ping}
+
+        def accept(self, event):
+            loop.unsubscribe(pinger)
+
+    batcher = Batcher()
+    loop = EventLoop()
+    loop.subscribe(Pinger(1))
+    loop.subscribe(pinger)
+    loop.subscribe(Remover())
+    loop.subscribe(batcher)
+    loop.iterate()
+    assert [len(batch) for batch in batcher.batches] == [1]
+
+
+@pytest.mark.timeout(0.1)
+def test_subscribe_twice():
+    counter = Counter()
+    loop = EventLoop()
+    loop.subscribe(counter)
+    with pytest.raises(RuntimeError):
+        loop.subscribe(counter)
+
+
+@pytest.mark.timeout(0.1)
+def test_subscribe_many_unsubscribe_many():
+    counters = [Counter() for _ in range(10)]
+    wildcard = Wildcard()
+    loop = EventLoop()
+    loop.subscribe_many(counters + [wildcard])
+    loop.put(Ping())
+    loop.iterate()
+    assert [c.count for c in counters] == [1] * 10
+    assert wildcard.events == [Iteration, Ping]
+
+    loop.unsubscribe_many(counters[::2] + [wildcard, Counter()])
+    loop.put(Ping())
+    loop.iterate()
+    assert [c.count for c in counters] == [1, 2] * 5
+    assert wildcard.events == [Iteration, Ping]
+
+
+
+@pytest.mark.timeout(0.1)
+def test_subscribe_many_already_subscribed():
+    a, b = Counter(), Counter()
+    loop = EventLoop()
+    loop.subscribe(a)
+    loop.put(Ping())
+    loop.iterate()
+    with pytest.raises(RuntimeError):
+        loop.subscribe_many([b, a])
+    with pytest.raises(RuntimeError):
+        loop.subscribe_many([b, b])
+    # Nothing is subscribed, so b may be subscribed and receives events.
+    loop.subscribe(b)
+    loop.put(Ping())
+    loop.iterate()
+    assert (a.count, b.count) == (2, 1)
+
+class Tagger(Listener):
+    def __init__(self, log, name):
+        self.log = log
+        self.name = name
+
+    def input_events(self):
+        return {Iteration}
+
+    def accept(self, event):
+        self.log.append(self.name)
+
+
+@pytest.mark.timeout(0.5)
+@pytest.mark.parametrize('yield_every', [1, 3])
+def test_loop_async_interleaves(yield_every):
+    log = []
+    loops = []
+    for name in 'ab':
+        loop = EventLoop()
+        loop.subscribe(Tagger(log, name))
+        loop.subscribe(Terminator(6, False))
+        loops.append(loop)
+
+    async def main():
+        await asyncio.gather(*(loop.loop_async(yield_every) for loop in loops))
+
+    asyncio.run(main())
+    expected = []
+    for _ in range(6 // yield_every):
+        expected += ['a'] * yield_every + ['b'] * yield_every
+    assert log == expected
+
+
+@pytest.mark.timeout(0.1)
+def test_loop_async_yield_every_validated():
+    with pytest.raises(ValueError):
+        asyncio.run(EventLoop().loop_async(0))
+
+
+@pytest.mark.timeout(0.5)
+def test_inject_from_coroutine():
+    counter = Counter()
+    loop = EventLoop()
+    loop.subscribe(counter)
+    loop.subscribe(Terminator(10, False))
+
+    async def producer():
+        for _ in range(3):
+            loop.inject(Ping())
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(loop.loop_async(), producer())
+
+    asyncio.run(main())
+    assert counter.count == 3
+
+
+@pytest.mark.timeout(1)
+def test_inject_from_thread():
+    counter = Counter()
+    loop = EventLoop()
+    loop.subscribe(counter)
+
+    def producer():
+        for _ in range(1000):
+            loop.inject(Ping())
+        loop.inject(Terminate(False))
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    loop.loop()
+    thread.join()
+    assert counter.count == 1000
+
+
+class Tally(Counter):
+    def snapshot(self):
+        return self.count
+
+    def restore(self, state):
+        self.count = state
+
+
+@pytest.mark.timeout(0.1)
+def test_snapshot_restore():
+    log = []
+    tally = Tally()
+    a, b, c = Tagger(log, 'a'), Tagger(log, 'b'), Tagger(log, 'c')
+    loop = EventLoop()
+    loop.subscribe_many([a, tally, b])
+    loop.put(Ping())
+    loop.iterate()
+    loop.put(Ping())
+    snapshot = loop.snapshot()
+
+    loop.iterate()
+    assert tally.count == 2
+    loop.unsubscribe(a)
+    loop.subscribe(c)
+    loop.put(Terminate(True))
+
+    loop.restore(snapshot)
+    assert tally.count == 1
+    log.clear()
+    assert loop.iterate()
+    assert tally.count == 2
+    # Order of subscription is kept.
+    assert log == ['a', 'b']
+
+
+@pytest.mark.timeout(0.1)
+def test_snapshot_restores_pending_listeners():
+    tally = Tally()
+    loop = EventLoop()
+    loop.put(AddListener(tally))
+    snapshot = loop.snapshot()
+    loop.iterate()
+    loop.put(Ping())
+    loop.iterate()
+    assert tally.count == 1
+
+    loop.restore(snapshot)
+    assert tally.count == 0
+    loop.iterate()
+    loop.put(Ping())
+    loop.iterate()
+    assert tally.count == 1
+
+
+class Quitter(Listener):
+    """Removes target, itself by default, on each iteration."""
+    def __init__(self, target=None):
+        self.target = target
+
+    def input_events(self):
+        return {Iteration}
+
+    def accept(self, event):
+        return RemoveListener(self if self.target is None else self.target)
+
+
+class Remover(Listener):
+    def __init__(self):
+        self.batches = []
+
+    def input_events(self):
+        return {RemoveListener}
+
+    def batch_events(self):
+        return {RemoveListener}
+
+    def accept_batch(self, events):
+        self.batches.append([event.listener for event in events])
+
+
+@pytest.mark.timeout(0.1)
+def test_accept_batch_keeps_self_removals():
+    quitters = [Quitter() for _ in range(3)]
+    remover = Remover()
+    loop = EventLoop()
+    loop.subscribe_many(quitters + [remover])
+    loop.iterate()
+    assert remover.batches == [quitters]
+
+
+@pytest.mark.timeout(0.1)
+def test_accept_batch_keeps_removals_by_senders_removed_later():
+    bystander = Counter()
+    victim = Quitter(bystander)
+    killer = Quitter(victim)
+    remover = Remover()
+    loop = EventLoop()
+    loop.subscribe_many([bystander, victim, killer, remover])
+    loop.iterate()
+    # The victim is removed after its removal of the bystander, in the same wave, as without batches.
+    assert bystander not in loop._listners and victim not in loop._listners
+    assert remover.batches == [[bystander, victim]]
@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+from eventloop import EventLoop, Event, Listener, Journal, JournalPlayer, JournalWriter
+from eventloop.events import Iteration, RemoveListener, Terminate
+import io
+import pytest
+
+
+@dataclass
+class Data(Event):
+    value: object = None
+
+
+class Echo(Event):
+    pass
+
+
+class Producer(Listener):
+    def __init__(self, name, n):
+        self.name = name
+        self.n = n
+        self.i = 0
+
+    def input_events(self):
+        return {Iteration, Echo}
+
+    def accept(self, event):
+        if isinstance(event, Echo):
+            return Data(value=-self.i)
+        self.i += 1
+        if self.i == self.n:
+            return [Data(value={'i': self.i, 'last': True}), RemoveListener(self)]
+        return [Data(value=self.i), Echo()]
+
+
+class Consumer(Listener):
+    name = 'consumer'
+
+    def __init__(self, n):
+        self.n = n
+        self.log = []
+        self.iterations = 0
+
+    def input_events(self):
+        return {Iteration, Data}
+
+    def accept(self, event):
+        if isinstance(event, Iteration):
+            self.iterations += 1
+            if self.iterations == self.n:
+                return Terminate(False)
+            return
+        self.log.append((self.iterations, event.sender.name, event.value))
+
+
+def run(producers, consumer, tracer=None, player=None, tally=None):
+    loop = EventLoop(tracer=tracer)
+    if player is not None:
+        loop.replay(player)
+    loop.subscribe_many(producers + [consumer] + ([] if tally is None else [tally]))
+    loop.loop()
+    return loop
+
+
+@pytest.mark.timeout(1)
+def test_record_replay():
+    file = io.BytesIO()
+    consumer = Consumer(6)
+    with JournalWriter(file, events={Data, Echo, RemoveListener}) as journal:
+        run([Producer('a', 3), Producer('b', 5)], consumer, tracer=journal)
+    assert consumer.log[:4] == [(1, 'a', 1), (1, 'b', 1), (1, 'a', -1), (1, 'b', -1)]
+    assert (3, 'a', {'i': 3, 'last': True}) in consumer.log
+
+    file.seek(0)
+    journal = Journal.read(file)
+    assert sorted(journal.objects.values()) == [('Producer', 'a'), ('Producer', 'b')]
+
+    producers = [Producer('a', 3), Producer('b', 5)]
+    replayed = Consumer(6)
+    loop = run(producers, replayed, player=JournalPlayer(journal, producers))
+    assert replayed.log == consumer.log
+    # Senders of journaled events are muted.
+    assert [p.i for p in producers] == [0, 0]
+    assert replayed.iterations == consumer.iterations
+    # Journaled RemoveListener events are replayed as well.
+    assert producers[0] not in loop._listners
+    assert producers[1] not in loop._listners
+
+
+@pytest.mark.timeout(0.1)
+def test_replay_unknown_object():
+    file = io.BytesIO()
+    with JournalWriter(file, events={Data}) as journal:
+        run([Producer('a', 3)], Consumer(3), tracer=journal)
+    file.seek(0)
+    with pytest.raises(ValueError):
+        JournalPlayer(Journal.read(file), [Producer('b', 3)])
+
+
+@pytest.mark.timeout(0.1)
+def test_not_a_journal():
+    with pytest.raises(ValueError):
+        Journal.read(io.BytesIO(b'{}'))
+
+
+class Stateful(Producer):
+    def __init__(self, name, n):
+        super().__init__(name, n)
+        self.states = 0
+        self.restored = []
+
+    def move_state(self):
+        self.states += 1
+        return {'i': self.i}
+
+    def replayed(self, events, state=None):
+        self.restored.append(state)
+
+
+@pytest.mark.timeout(0.1)
+def test_state_is_read_only_while_recording():
+    producer = Stateful('a', 3)
+    run([producer], Consumer(3))
+    assert producer.states == 0
+
+    file = io.BytesIO()
+    producer = Stateful('a', 3)
+    with JournalWriter(file, events={Data, Echo}) as journal:
+        run([producer], Consumer(3), tracer=journal)
+    assert producer.states > 0
+
+    file.seek(0)
+    replayed = Stateful('a', 3)
+    run([replayed], Consumer(3), player=JournalPlayer(Journal.read(file), [replayed]))
+    assert replayed.restored[:3] == [{'i': 1}, {'i': 1}, {'i': 2}]
+
+
+class Burst(Listener):
+    name = 'burst'
+
+    def input_events(self):
+        return {Iteration}
+
+    def accept(self, event):
+        return [Data(value={str(i): i for i in range(300)}) for _ in range(300)] + [Terminate(False)]
+
+
+@pytest.mark.timeout(1)
+def test_large_responses():
+    file = io.BytesIO()
+    with JournalWriter(file, events={Data}) as journal:
+        loop = EventLoop(tracer=journal)
+        loop.subscribe(Burst())
+        loop.loop()
+    file.seek(0)
+    [response] = Journal.read(file).iterations[1]
+    assert len(response.events) == 300
+    assert response.events[-1] == (Data, {'value': {str(i): i for i in range(300)}})
+
+
+@pytest.mark.timeout(1)
+def test_too_many_fields():
+    file = io.BytesIO()
+    journal = JournalWriter(file, events={Data})
+    journal.event(0, Iteration())
+    with pytest.raises(ValueError):
+        journal.response(Burst(), [Data(value=dict.fromkeys(map(str, range(0x10000))))])
+    # Nothing of the response is written.
+    file.seek(0)
+    assert not any(Journal.read(file).iterations.values())
+
+
+@dataclass
+class Total(Event):
+    value: int = 0
+
+
+class Summer(Listener):
+    name = 'summer'
+
+    def input_events(self):
+        return {Data}
+
+    def batch_events(self):
+        return {Data}
+
+    def accept_batch(self, events):
+        return Total(value=sum(1 for _ in events))
+
+
+class Tally(Listener):
+    name = 'tally'
+
+    def __init__(self):
+        self.totals = []
+
+    def input_events(self):
+        return {Total}
+
+    def accept(self, event):
+        self.totals.append(event.value)
+
+
+@pytest.mark.timeout(0.1)
+def test_record_replay_batch_sender():
+    file = io.BytesIO()
+    tally = Tally()
+    with JournalWriter(file, events={Total}, senders={Summer}) as journal:
+        run([Producer('a', 3), Producer('b', 5), Summer()], Consumer(4), tracer=journal, tally=tally)
+    assert len(tally.totals) > 4
+
+    file.seek(0)
+    summer = Summer()
+    summer.accept_batch = None  # Muted, so the batch is not handled.
+    replayed = Tally()
+    run([Producer('a', 3), Producer('b', 5), summer], Consumer(4), player=JournalPlayer(Journal.read(file), [summer]), tally=replayed)
+    assert replayed.totals == tally.totals
@@ -0,0 +1,91 @@
+from eventloop import EventLoop, Event, Listener
+from eventloop.events import Iteration, Terminate
+import pytest
+
+
+class Ping(Event):
+    pass
+
+
+class Pinger(Listener):
+    def __init__(self, countdown):
+        self.countdown = countdown
+
+    def input_events(self):
+        return {Iteration, Ping}
+
+    def accept(self, event):
+        if isinstance(event, Ping):
+            return None
+        self.countdown -= 1
+        if self.countdown == 0:
+            return Terminate(False)
+        return [Ping(), Ping()]
+
+
+def run(stats, countdown=3):
+    loop = EventLoop(stats=stats)
+    loop.subscribe(Pinger(countdown))
+    loop.loop()
+    return loop
+
+
+@pytest.mark.timeout(0.1)
+def test_disabled():
+    assert run(stats=False).stats().iterations == 0
+
+
+@pytest.mark.timeout(0.1)
+def test_counts():
+    stats = run(stats=True).stats()
+    assert stats.iterations == 3
+    assert stats.waves == 6
+    assert stats.events == {Iteration: 3, Ping: 4, Terminate: 1}
+    assert stats.listeners[Pinger].calls == 7
+    assert stats.listeners[Pinger].time > 0
+    assert stats.wave_production == [5, 0]
+    assert stats.produced() == 5
+    assert stats.iteration_production_max == 2
+    assert 'Pinger' in stats.summary()
+
+
+@pytest.mark.timeout(0.1)
+def test_reset_and_disable():
+    loop = EventLoop(stats=True)
+    loop.subscribe(Pinger(10))
+    loop.iterate()
+    assert loop.stats().iterations == 1
+
+    loop.reset_stats()
+    assert loop.stats().iterations == 0
+
+    loop.iterate()
+    loop.enable_stats(False)
+    loop.iterate()
+    assert loop.stats().iterations == 1
+
+
+@pytest.mark.timeout(0.1)
+def test_disabled_batches_are_not_timed(monkeypatch):
+    class Batcher(Listener):
+        def __init__(self):
+            self.batches = 0
+
+        def input_events(self):
+            return {Ping}
+
+        def batch_events(self):
+            return {Ping}
+
+        def accept_batch(self, events):
+            self.batches += 1
+
+    def unexpected():
+        raise AssertionError("listener is timed")
+
+    monkeypatch.setattr('eventloop.eventloop.perf_counter', unexpected)
+    batcher = Batcher()
+    loop = EventLoop(stats=False)
+    loop.subscribe_many([Pinger(3), batcher])
+    loop.loop()
+    assert batcher.batches == 2
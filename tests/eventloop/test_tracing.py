@@ -0,0 +1,68 @@
+from eventloop import EventLoop, Event, Listener
+from eventloop.events import Iteration, Terminate
+from eventloop.tracing import JsonlTracer, LoggingTracer
+import io
+import json
+import logging
+import pytest
+
+
+class Ping(Event):
+    pass
+
+
+class Pinger(Listener):
+    name = 'pinger'
+
+    def input_events(self):
+        return {Iteration, Ping}
+
+    def accept(self, event):
+        if isinstance(event, Iteration):
+            return [Ping, Terminate(False)]
+
+
+def run(tracer):
+    loop = EventLoop(tracer=tracer)
+    loop.subscribe(Pinger())
+    loop.loop()
+
+
+@pytest.mark.timeout(0.1)
+def test_jsonl():
+    file = io.StringIO()
+    with JsonlTracer(file) as tracer:
+        run(tracer)
+    records = [json.loads(line) for line in file.getvalue().splitlines()]
+
+    assert records[0] == {'sub': 0, 'c': 'EventLoop', 'n': None, 'e': ['AddListener', 'RemoveListener', 'Terminate']}
+    assert records[1] == {'sub': 1, 'c': 'Pinger', 'n': 'pinger', 'e': ['Iteration', 'Ping']}
+    assert records[2:] == [
+        {'i': 1},
+        {'w': 0, 'e': 'Iteration', 's': 0},
+        {'r': 1, 'p': ['Ping', 'Terminate']},
+        {'w': 1, 'e': 'Ping', 's': 1},
+        {'w': 1, 'e': 'Terminate', 's': 1},
+    ]
+
+
+@pytest.mark.timeout(0.1)
+def test_logging(caplog):
+    with caplog.at_level(logging.DEBUG):
+        run(LoggingTracer())
+    assert 'handle event' in caplog.text
+    assert 'responded with' in caplog.text
+
+
+@pytest.mark.timeout(0.1)
+def test_logging_bound_at_debug(caplog):
+    with caplog.at_level(logging.DEBUG):
+        run(None)
+    assert 'handle event' in caplog.text
+
+
+@pytest.mark.timeout(0.1)
+def test_no_tracing(caplog):
+    with caplog.at_level(logging.INFO):
+        run(None)
+    assert caplog.text == ''
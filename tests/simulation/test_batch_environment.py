@@ -0,0 +1,92 @@
+from autosim.car import ACar
+from eventloop import Listener
+from eventloop.events import Terminate
+from simulation import BatchEnvironment, Environment, Timer
+from simulation.environment.events import Tick
+from simulation.location import Circle, CircleSpace, Line
+import pytest
+
+
+def movement(speed, location, name):
+    return ACar(function=f"{speed} * dt", mode=ACar.Mode.MOVEMENT, location=location, name=name)
+
+
+def world(k, space):
+    location = (lambda x: Circle(space, x)) if isinstance(space, CircleSpace) else Line
+    # Different worlds collide at different moments, some cars accelerate.
+    return [movement(10 + k, location(0), 'a'), ACar(function=f"{0.2 * k}", location=location(20), name='b'),
+            movement(5, location(40 + k), 'c')]
+
+
+def trace(environment, bodies, running) -> list:
+    records = []
+    while True:
+        more = running()
+        records.append([(body.name, body.location.x(), body.v) for body in bodies()])
+        if not more:
+            return records
+
+
+def reference(listeners, timeout) -> list:
+    environment = Environment()
+    terminator = Timer(environment=environment, timeout=timeout, event=Terminate, kwargs={'immediate': False})
+    terminator.start()
+    environment.subscribe(terminator, *listeners)
+    return trace(environment, lambda: environment.bodies, environment.loop.iterate)
+
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize('space', [CircleSpace(100), Line(0).space])
+def test_matches_environment(space):
+    K = 4
+    expected = [reference(world(k, space), timeout=3) for k in range(K)]
+
+    batch = BatchEnvironment([world(k, space) for k in range(K)], timeout=3)
+    traces = [[] for _ in range(K)]
+    while True:
+        running = [w.running for w in batch.worlds]
+        more = batch.iterate()
+        for k, w in enumerate(batch.worlds):
+            if running[k]:
+                traces[k].append([(body.name, body.location.x(), body.v) for body in w.bodies])
+        if not more:
+            break
+
+    assert traces == expected
+    # Collided cars are removed.
+    assert any(len(w.bodies) < 3 for w in batch.worlds)
+
+
+class Stopper(Listener):
+    """Terminates its world at a given time."""
+
+    def __init__(self, time, immediate):
+        self.time = time
+        self.immediate = immediate
+
+    def input_events(self):
+        return {Tick}
+
+    def accept(self, event):
+        if event.environment.time >= self.time:
+            return Terminate(self.immediate)
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('immediate', [False, True])
+def test_terminated_worlds_are_masked(immediate):
+    early = movement(1, Line(0), 'early')
+    late = movement(1, Line(0), 'late')
+    batch = BatchEnvironment([[Stopper(0.1, immediate), early], [Stopper(0.5, False), late]])
+    batch.simulate()
+
+    assert [w.running for w in batch.worlds] == [False, False]
+    # Immediate termination drops moves of the last update.
+    assert early.location.x() == pytest.approx(0.1 if immediate else 0.11)
+    assert late.location.x() == pytest.approx(0.51)
+    assert batch.time == pytest.approx(0.5)
+
+
+def test_worlds_share_space():
+    with pytest.raises(RuntimeError):
+        BatchEnvironment([[movement(1, Line(0), 'a')], [movement(1, Circle(CircleSpace(10), 0), 'b')]])
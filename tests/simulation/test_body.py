@@ -1,5 +1,6 @@
 
 from simulation import Body
+from types import MemberDescriptorType
 from simulation.location import Line
 import pytest
 
@@ -29,3 +30,33 @@ def test_acceleration_start_velocity_push_const(body):
     body.v = 10
     assert body.push(10, lambda t, x, v: 100).dx == 105
     assert body.v == 11
+
+
+def test_location_is_owned():
+    location = Line(0)
+    first, second = Body(location, 1000), Body(location, 1000)
+    first.location.shift(10)
+    assert location.x() == 0
+    assert second.location.x() == 0
+
+
+def test_slotted(body):
+    assert not hasattr(body, '__dict__')
+    assert not hasattr(body.location, '__dict__')
+    assert not hasattr(body.move(1), '__dict__')
+
+
+def test_no_shadowed_slots():
+    slots = [name for cls in Body.__mro__ for name in cls.__dict__.get('__slots__', ())]
+    assert len(slots) == len(set(slots))
+    # Slots of bases are not shadowed by properties of subclasses.
+    assert all(isinstance(getattr(Body, name), MemberDescriptorType) for name in slots)
+
+
+def test_subclass_dynamic_attributes():
+    class Tagged(Body):
+        pass
+
+    body = Tagged(Line(0), 1000)
+    body.u = 0.5
+    assert body.u == 0.5
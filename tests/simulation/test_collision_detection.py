@@ -3,9 +3,10 @@ import pytest
 
 from autosim.car import ACar
 from eventloop.eventloop import Event, Terminate
-from eventloop.events import Iteration
+from eventloop.events import Iteration, RemoveListener
 import simulation
-from simulation.location import Circle, CircleSpace, Line
+from simulation.location import Circle, CircleSpace, Line, LineSpace, Path, collisions
+import numpy
 from simulation import Environment
 from simulation.environment.events import Tick, Collision
 from simulation.object import Object
@@ -130,3 +131,124 @@ def test_circle(posl, speedl, posr, speedr, sim_time, collider):
     carl = car(speedl, Circle(CircleSpace(1000), posl))
     carr = car(speedr, Circle(CircleSpace(1000), posr))
     perform_testing(carl, carr, sim_time, collider)
+
+
+def reference_collisions(locations, dx):
+    paths = [Path(location, d) for location, d in zip(locations, dx)]
+    N = len(paths)
+    return [i for i in range(N) if paths[i].collides(paths[(i + 1) % N])]
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('space', [LineSpace(), CircleSpace(100)])
+def test_vectorized_matches_paths(seed, space):
+    rng = numpy.random.default_rng(seed)
+    N = int(rng.integers(2, 50))
+    # Coarse grid provokes equal positions and transitions.
+    x = numpy.sort(rng.integers(0, 100, N) * rng.choice([1, 0.5, 0.1])).astype(float)
+    dx = rng.integers(0, 30, N) * rng.choice([1, 0.25, 0.1])
+    dx[rng.random(N) < 0.2] = 0
+    location = (lambda x: Circle(space, x)) if isinstance(space, CircleSpace) else Line
+    locations = [location(float(v)) for v in x]
+    x = numpy.array([l.x() for l in locations])
+
+    assert collisions(space, x, dx).tolist() == reference_collisions(locations, dx.tolist())
+
+
+def test_environment_matches_paths():
+    rng = numpy.random.default_rng(0)
+    space = CircleSpace(200)
+    environment = Environment()
+    environment.subscribe(*[car(int(rng.integers(0, 500)), Circle(space, float(x))) for x in rng.integers(0, 200, 100)])
+    for _ in range(5):
+        environment.iterate()
+        expected = [(c.collider, c.collidee) for c in environment._detect_collision_paths()]
+        assert [(c.collider, c.collidee) for c in environment.detect_collision()] == expected
+
+
+def test_environment_remove_keeps_displacements_aligned():
+    space = CircleSpace(200)
+    cars = [car(100 + 10 * i, Circle(space, 20.0 * i)) for i in range(10)]
+    environment = Environment()
+    environment.subscribe(*cars)
+    environment.iterate()
+    environment.put(RemoveListener(cars[4]))
+    for _ in range(3):
+        environment.iterate()
+        assert len(environment._dx) == len(environment.bodies)
+        for body, x0, dx in zip(environment.bodies, environment._start_positions(), environment._dx):
+            assert body.location.x() == pytest.approx(Circle(space, x0 + dx).x())
+    assert cars[4] not in environment.bodies
+
+
+@pytest.mark.parametrize('arrays', [False, True])
+def test_environment_pile_up_removes_colliders_at_once(arrays, monkeypatch):
+    calls = []
+    remove_many = Environment.remove_many
+    monkeypatch.setattr(Environment, 'remove_many', lambda self, listeners: calls.append(list(listeners)) or remove_many(self, listeners))
+
+    space = CircleSpace(200)
+    # Fast cars run into slow ones ahead of them in the same tick.
+    cars = [car(3000 if i % 2 == 0 else 1, Circle(space, 20.0 * i)) for i in range(10)]
+    environment = Environment(arrays=arrays)
+    environment.subscribe(*cars)
+    environment.iterate()
+    environment.iterate()
+
+    assert calls == [cars[0::2]]
+    assert environment.bodies == cars[1::2]
+    assert environment.moveables == cars[1::2]
+    assert len(environment.objects) == 5
+    if arrays:
+        assert [body._row for body in environment.bodies] == list(range(5))
+        assert all(body._state is None for body in cars[0::2])
+    else:
+        assert len(environment._x0) == len(environment._dx) == 5
+    for body in environment.bodies:
+        assert environment.index_of(body) == environment.bodies.index(body)
+
+
+class Remover(Object):
+    """Removes target on each tick."""
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+
+    def input_events(self):
+        return [Tick]
+
+    def accept(self, event):
+        return RemoveListener(self.target)
+
+
+@pytest.mark.parametrize('arrays', [False, True])
+def test_environment_removal_by_remover_removed_later(arrays):
+    space = CircleSpace(200)
+    removed = car(1, Circle(space, 0))
+    kept = car(1, Circle(space, 50))
+    remover = Remover(removed)
+    # Removes the remover after it requested the removal, in the same wave.
+    environment = Environment(arrays=arrays)
+    environment.subscribe(removed, kept, remover, Remover(remover))
+    environment.iterate()
+    environment.iterate()
+
+    assert removed not in environment.loop._listners
+    assert environment.bodies == [kept]
+    assert environment.moveables == [kept]
+    assert removed not in environment.objects and remover not in environment.objects
+
+
+@pytest.mark.parametrize('arrays', [False, True])
+def test_environment_drops_moves_of_bodies_removed_in_the_wave(arrays):
+    space = CircleSpace(200)
+    first, second, third = car(1, Circle(space, 0)), car(1, Circle(space, 50)), car(1, Circle(space, 100))
+    environment = Environment(arrays=arrays)
+    # Removal of the first car opens the wave, the move of the second one comes before its removal.
+    environment.subscribe(Remover(first), first, second, Remover(second), third)
+    environment.iterate()
+    environment.iterate()
+
+    assert environment.bodies == [third]
+    assert environment.index_of(third) == 0
+    assert third.location.x() == pytest.approx(100.02)
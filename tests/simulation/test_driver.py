@@ -0,0 +1,126 @@
+from time import monotonic
+from eventloop import EventLoop, Listener
+from eventloop.events import Terminate
+from simulation import Driver, Environment
+from simulation.environment.environment import UpdateRequest
+import pytest
+
+
+class FakeClock:
+    def __init__(self, oversleep=0):
+        self.now = 100.0
+        self.oversleep = oversleep
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds + self.oversleep
+
+
+class Recorder(Listener):
+    def __init__(self, clock, n, work=None):
+        self.clock = clock
+        self.n = n
+        self.work = work or {}
+        self.times = []
+
+    def input_events(self):
+        return {UpdateRequest}
+
+    def accept(self, event):
+        self.times.append(self.clock())
+        # Simulate expensive update.
+        if hasattr(self.clock, 'now'):
+            self.clock.now += self.work.get(len(self.times), 0)
+        if len(self.times) == self.n:
+            return Terminate(True)
+
+
+def run(driver, recorder):
+    loop = EventLoop()
+    loop.subscribe(driver)
+    loop.subscribe(recorder)
+    loop.loop()
+    return [t - recorder.times[0] for t in recorder.times]
+
+
+def realtime(clock, dt=0.5, policy=Driver.Policy.CATCH_UP):
+    return Driver(Driver.Type.REALTIME, dt=dt, policy=policy, clock=clock, sleep=clock.sleep)
+
+
+@pytest.mark.timeout(0.1)
+def test_realtime_on_schedule():
+    clock = FakeClock()
+    driver = realtime(clock)
+    assert run(driver, Recorder(clock, 5)) == [0, 0.5, 1, 1.5, 2]
+    assert driver.stats.ticks == 5
+    assert driver.stats.overruns == 0
+    assert driver.stats.lateness_max == 0
+
+
+@pytest.mark.timeout(0.1)
+def test_realtime_no_drift():
+    clock = FakeClock(oversleep=0.125)
+    driver = realtime(clock)
+    times = run(driver, Recorder(clock, 5))
+    # First tick is not slept for, all the others are late by the same amount.
+    assert times == [0, 0.625, 1.125, 1.625, 2.125]
+    assert driver.stats.lateness_max == 0.125
+    assert driver.stats.lateness_mean() == pytest.approx(0.1)
+    assert driver.stats.jitter() == pytest.approx(0.05)
+
+
+@pytest.mark.timeout(0.1)
+def test_realtime_catch_up():
+    clock = FakeClock()
+    driver = realtime(clock)
+    times = run(driver, Recorder(clock, 6, work={2: 1.25}))
+    assert times == [0, 0.5, 1.75, 1.75, 2, 2.5]
+    assert driver.stats.overruns == 1
+    assert driver.stats.skipped == 0
+    assert driver.stats.lateness_max == 0.75
+
+
+@pytest.mark.timeout(0.1)
+def test_realtime_skip():
+    clock = FakeClock()
+    driver = realtime(clock, policy=Driver.Policy.SKIP)
+    times = run(driver, Recorder(clock, 5, work={2: 1.25}))
+    assert times == [0, 0.5, 1.75, 2, 2.5]
+    assert driver.stats.overruns == 1
+    assert driver.stats.skipped == 1
+    assert driver.stats.lateness_max == 0.25
+
+
+@pytest.mark.timeout(1)
+def test_realtime_wall_clock():
+    driver = Driver(Driver.Type.REALTIME)
+    environment = Environment(dt=0.01, driver=driver)
+    recorder = Recorder(monotonic, 10)
+    environment.subscribe(recorder)
+    environment.simulate()
+    assert driver.dt == 0.01
+    assert recorder.times[-1] - recorder.times[0] >= 0.09 - 1e-6
+    assert environment.time == pytest.approx(0.09)
+
+
+@pytest.mark.timeout(0.1)
+def test_default_drivers_are_not_shared():
+    a, b = Environment(dt=0.5), Environment(dt=0.25)
+    drivers = [next(l for l in e.loop._listners if isinstance(l, Driver)) for e in (a, b)]
+    assert drivers[0] is not drivers[1]
+    assert [d.dt for d in drivers] == [0.5, 0.25]
+
+
+@pytest.mark.timeout(0.1)
+def test_rebound_realtime_driver_starts_over():
+    clock = FakeClock()
+    driver = Driver(Driver.Type.REALTIME, policy=Driver.Policy.SKIP, clock=clock, sleep=clock.sleep)
+    Environment(dt=0.5, driver=driver)
+    assert run(driver, Recorder(clock, 3)) == [0, 0.5, 1]
+
+    clock.now += 10
+    Environment(dt=0.25, driver=driver)
+    assert driver.dt == 0.25
+    assert run(driver, Recorder(clock, 3)) == [0, 0.25, 0.5]
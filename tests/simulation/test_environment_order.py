@@ -0,0 +1,162 @@
+from autosim.car import ACar
+from simulation import Environment
+from simulation.environment.environment import _repair_order
+from simulation.environment.events import Tick
+from simulation.location import Circle, CircleSpace, Line
+from simulation.object import Object
+import numpy
+import pytest
+
+
+class Ghost(ACar):
+    """Passes through other cars."""
+
+    def on_collision(self, collision):
+        return None
+
+
+def ghost(speed, location, name):
+    return Ghost(function=f"{speed} * dt", mode=ACar.Mode.MOVEMENT, location=location, name=name)
+
+
+class Watcher(Object):
+    """Records order of bodies as seen on ticks."""
+
+    def __init__(self):
+        super().__init__()
+        self.orders = []
+
+    def input_events(self):
+        return {Tick}
+
+    def accept(self, event):
+        bodies = event.environment.bodies
+        positions = [body.location.x() for body in bodies]
+        assert positions == sorted(positions)
+        self.orders.append([body.name for body in bodies])
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('arrays', [False, True])
+def test_overtake(arrays):
+    environment = Environment(arrays=arrays)
+    fast, slow = ghost(20, Line(0), 'fast'), ghost(10, Line(5), 'slow')
+    watcher = Watcher()
+    environment.subscribe(fast, slow, watcher)
+    environment.iterate()
+    environment.iterate()
+    assert fast.next(environment) is slow
+
+    for _ in range(100):
+        environment.iterate()
+    assert watcher.orders[-1] == ['slow', 'fast']
+    assert [moveable.name for moveable in environment.moveables] == ['slow', 'fast']
+    assert slow.next(environment) is fast
+    assert fast.next(environment) is None
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('arrays', [False, True])
+def test_wraparound(arrays):
+    space = CircleSpace(100)
+    environment = Environment(arrays=arrays)
+    names = ['0', '25', '50', '75']
+    watcher = Watcher()
+    environment.subscribe(*[ghost(500, Circle(space, int(name)), name) for name in names], watcher)
+    for _ in range(30):
+        environment.iterate()
+
+    rotations = [names[i:] + names[:i] for i in range(len(names))]
+    # Cyclic order is kept.
+    assert all(order in rotations for order in watcher.orders)
+    assert len({tuple(order) for order in watcher.orders}) > 1
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_repair_order(seed):
+    class Item:
+        def __init__(self, x):
+            self.location = Line(x)
+
+    rng = numpy.random.default_rng(seed)
+    x = numpy.sort(rng.integers(0, 50, 100)).astype(float)
+    x += rng.integers(-3, 4, 100) * (rng.random(100) < 0.1)
+    items = [Item(float(v)) for v in x]
+    expected = sorted(items, key=lambda item: item.location.x())
+    unsorted = items != expected
+    assert _repair_order(items) == unsorted
+    assert items == expected
+    assert not _repair_order(items)
+
+
+@pytest.mark.timeout(0.5)
+@pytest.mark.parametrize('arrays', [False, True])
+@pytest.mark.parametrize('circle', [False, True])
+def test_next_prev_of(arrays, circle):
+    space = CircleSpace(100)
+    location = (lambda x: Circle(space, x)) if circle else Line
+    environment = Environment(arrays=arrays)
+    cars = [ghost(0, location(x), str(x)) for x in (50, 10, 30)]
+    environment.subscribe(*cars)
+    environment.iterate()
+    c50, c10, c30 = cars
+
+    assert [environment.index_of(car) for car in cars] == [2, 0, 1]
+    assert environment.next_of(c10) is c30
+    assert environment.next_of(c30) is c50
+    assert environment.next_of(c50) is (c10 if circle else None)
+    assert environment.prev_of(c50) is c30
+    assert environment.prev_of(c10) is (c50 if circle else None)
+    assert environment.next_of(ghost(0, location(0), 'other')) is None
+
+
+def populate(arrays: bool, bulk: bool, groups: list[list[float]], steps: int = 0) -> tuple[Environment, Watcher]:
+    """Environment with ghosts added in groups, stepping between groups."""
+    environment = Environment(arrays=arrays)
+    watcher = Watcher()
+    environment.subscribe(watcher)
+    space = CircleSpace(1000)
+    for g, group in enumerate(groups):
+        ghosts = [ghost(10 + i % 7, Circle(space, x), f"{g}.{i}") for i, x in enumerate(group)]
+        if bulk:
+            environment.add_many(ghosts)
+        else:
+            environment.subscribe(*ghosts)
+        for _ in range(steps):
+            environment.iterate()
+    return environment, watcher
+
+
+@pytest.mark.timeout(2)
+@pytest.mark.parametrize('arrays', [False, True])
+@pytest.mark.parametrize('steps', [1, 20])
+def test_add_many_matches_subscribe(arrays, steps):
+    rng = numpy.random.default_rng(7)
+    # Equal positions keep the order of adding.
+    groups = [rng.choice(1000, 50).tolist(), [0, 0, 500, 500] + rng.choice(1000, 30).tolist(), [float(x) for x in rng.uniform(0, 1000, 40)]]
+    expected, _ = populate(arrays, bulk=False, groups=groups, steps=steps)
+    environment, watcher = populate(arrays, bulk=True, groups=groups, steps=steps)
+
+    assert [body.name for body in environment.bodies] == [body.name for body in expected.bodies]
+    assert [m.name for m in environment.moveables] == [m.name for m in expected.moveables]
+    assert [body.location.x() for body in environment.bodies] == [body.location.x() for body in expected.bodies]
+    if arrays:
+        assert [body._row for body in environment.bodies] == list(range(len(environment.bodies)))
+    else:
+        assert numpy.array_equal(environment._x0, expected._x0, equal_nan=True)
+    # Added listeners are subscribed.
+    assert watcher.orders
+    assert all(body.environment is environment for body in environment.bodies)
+
+
+def test_add_many_between_moves_keeps_order_for_collisions():
+    environment = Environment()
+    fast, slow = ghost(300, Line(0), 'fast'), ghost(10, Line(1), 'slow')
+    environment.add_many([fast, slow])
+    environment.iterate()
+    # Fast one has passed slow one, order is repaired with the next update only.
+    assert fast.location.x() > slow.location.x()
+    environment.add_many([ghost(10, Line(100), 'far')])
+    assert [body.name for body in environment.bodies] == ['fast', 'slow', 'far']
+    collisions = environment.detect_collision()
+    assert [(c.collider.name, c.collidee.name) for c in collisions] == [('fast', 'slow')]
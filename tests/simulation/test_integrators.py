@@ -0,0 +1,87 @@
+from autosim.car import ACar
+from simulation import Body, Environment
+from simulation.location import Line
+from simulation.math.integrators import INTEGRATORS, euler, exact, integrator, rk4, semi_implicit_euler
+from simulation.math.rk2a import rk2a_motion
+import pytest
+
+
+CAR = ACar('0')
+
+
+def fine(force, mass, v0, h, steps=10_000):
+    x, v = 0.0, v0
+    for _ in range(steps):
+        dx, v = rk4(force, mass, v, h / steps)
+        x += dx
+    return x, v
+
+
+@pytest.mark.parametrize('step, order', [(euler, 1), (semi_implicit_euler, 1), (rk2a_motion, 2), (rk4, 4)])
+def test_order_of_accuracy(step, order):
+    force = lambda t, x, v: 100 - 5 * v - 0.5 * v**2
+    x, v = fine(force, 10, 5.0, 1.0)
+
+    def global_error(n):
+        dx, w = 0.0, 5.0
+        for _ in range(n):
+            d, w = step(force, 10, w, 1 / n)
+            dx += d
+        return abs(dx - x) + abs(w - v)
+
+    assert global_error(10) / global_error(20) == pytest.approx(2 ** order, rel=0.25)
+
+
+@pytest.mark.parametrize('u, v0', [(1, 0.0), (1, 20.0), (1, 80.0), (0.2, 40.0), (0, 30.0), (-0.5, 30.0), (-1, 0.5)])
+def test_exact_matches_fine_rk4(u, v0):
+    force = CAR.get_force(u)
+    x, v = exact(force, CAR.mass, v0, 0.5)
+    expected_x, expected_v = fine(force, CAR.mass, v0, 0.5)
+    # A body stops instead of driving backwards.
+    assert v >= 0
+    if expected_v > 0:
+        assert (x, v) == pytest.approx((expected_x, expected_v), rel=1e-9, abs=1e-9)
+
+
+def test_exact_at_terminal_speed():
+    force = CAR.get_force(1)
+    a, b = force.quadratic()
+    s = (a / b) ** 0.5
+    assert exact(force, CAR.mass, s, 0.1) == (s * 0.1, s)
+
+
+def test_exact_without_quadratic_falls_back_to_rk4():
+    force = lambda t, x, v: 10 * t - x + v
+    assert exact(force, 2, 3, 0.5) == rk4(force, 2, 3, 0.5)
+
+
+def test_car_force_quadratic():
+    for u in (-1, -0.3, 0, 0.4, 1):
+        force = CAR.get_force(u)
+        a, b = force.quadratic()
+        for v in (0, 7.5, 33):
+            assert force(0, 0, v) == pytest.approx(a - b * v**2)
+
+
+def test_integrator_by_name():
+    assert integrator('rk2') is rk2a_motion
+    assert integrator(rk4) is rk4
+    assert set(INTEGRATORS) == {'euler', 'semi_implicit_euler', 'rk2', 'rk4', 'exact'}
+    with pytest.raises(ValueError):
+        integrator('leapfrog')
+
+
+def test_environment_integrator():
+    assert Environment().integrator is rk2a_motion
+    environment = Environment(integrator='euler')
+    body = Body(Line(0), 1000, 10)
+    environment.subscribe(body)
+    environment.iterate()
+    force = lambda t, x, v: -50 * v
+    assert body.push(0.1, force).dx == euler(force, 1000, 10, 0.1)[0]
+    assert body.v == euler(force, 1000, 10, 0.1)[1]
+
+
+def test_unknown_environment_integrator():
+    with pytest.raises(ValueError):
+        Environment(integrator='leapfrog')
@@ -0,0 +1,58 @@
+from autosim.car import ACar
+from autosim.simulation import Simulation, SimulationParameters
+from eventloop import Journal, JournalPlayer, JournalWriter
+from eventloop.events import RemoveListener
+from simulation import Body
+from simulation.environment.events import Tick, Collision
+from simulation.location import Circle, CircleSpace
+from simulation.moveable.events import Move
+from simulation.object import Object
+import io
+import pytest
+
+
+class Watcher(Object):
+    def __init__(self):
+        super().__init__()
+        self.log = []
+        self.collisions = 0
+
+    def input_events(self):
+        return [Tick, Collision]
+
+    def accept(self, event):
+        if isinstance(event, Collision):
+            self.collisions += 1
+            return
+        self.log.append([(b.name, b.location.x(), b.v) for b in event.environment.bodies])
+
+
+def unexpected(t, dt):
+    raise AssertionError("replayed car is simulated")
+
+
+def cars(fast, slow):
+    space = CircleSpace(100)
+    return [ACar(function=fast, location=Circle(space, 0), name='fast'),
+            ACar(function=slow, location=Circle(space, 10), name='slow')]
+
+
+def simulate(objects, **kwargs):
+    watcher = Watcher()
+    Simulation(SimulationParameters(timeout=5, objects=objects + [watcher], **kwargs)).simulate()
+    return watcher
+
+
+@pytest.mark.timeout(2)
+def test_replay_restores_bodies():
+    file = io.BytesIO()
+    with JournalWriter(file, events={Move, RemoveListener}, senders={Body}) as journal:
+        recorded = simulate(cars('1', '0.1'), tracer=journal)
+    assert recorded.collisions > 0
+    assert len(recorded.log[-1]) < 2
+
+    file.seek(0)
+    objects = cars(unexpected, unexpected)
+    replayed = simulate(objects, replay=JournalPlayer(Journal.read(file), objects))
+    assert replayed.log == recorded.log
+    assert replayed.collisions == recorded.collisions
@@ -120,3 +120,32 @@ class TestCollisionDetection:
     def test_circle_positive(self, ax, adx, bx, bdx, unit_circle):
         TestCollisionDetection.circle_template(
             True, ax, adx, bx, bdx, unit_circle)
+
+
+class TestShift:
+
+    @parametrize('x,dx', [(0, 0), (0.5, 0.2), (0.9, 0.2), (0.3, 1.7), (0.0, 1.0)])
+    def test_circle_shift_as_moved(self, x, dx):
+        space = CircleSpace(1)
+        location = Circle(space, x)
+        moved = location.moved(dx)
+        location.shift(dx)
+        assert location.x() == moved.x()
+        assert location.space is space
+
+    def test_line_shift_as_moved(self):
+        location = Line(1.5)
+        moved = location.moved(2)
+        location.shift(2)
+        assert location.x() == moved.x() == 3.5
+
+    def test_lines_share_space(self):
+        assert Line(0).space is Line(1).space
+
+    def test_copy_is_independent(self):
+        location = Circle(CircleSpace(10), 3)
+        copy = location.copy()
+        copy.shift(1)
+        assert location.x() == 3
+        assert copy.x() == 4
+        assert copy.space is location.space
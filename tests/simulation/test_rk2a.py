@@ -0,0 +1,36 @@
+from autosim.car import ACar
+from simulation import Body
+from simulation.location import Line
+from simulation.math.rk2a import rk2a, rk2a_motion
+import numpy
+import pytest
+
+
+def reference(force, mass, v0, h):
+    return rk2a(lambda xv, t: numpy.asarray([xv[1], force(t, xv[0], xv[1]) / mass]), [0, v0], [0, h])[-1]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_motion_matches_rk2a(seed):
+    rng = numpy.random.default_rng(seed)
+    car = ACar('0')
+    for u, v0, h in zip(rng.uniform(-1, 1, 200), rng.uniform(0, 60, 200), rng.choice([0.01, 0.1, 1 / 30, 0.37], 200)):
+        force = car.get_force(float(u))
+        x, v = rk2a_motion(force, car.mass, float(v0), float(h))
+        # Bit for bit.
+        assert (x, v) == tuple(reference(force, car.mass, float(v0), float(h)))
+
+
+def test_motion_depends_on_time_and_position():
+    def force(t, x, v):
+        return 10 * t - x + v
+
+    assert rk2a_motion(force, 2, 3, 0.5) == tuple(reference(force, 2, 3, 0.5))
+
+
+def test_push_matches_rk2a():
+    body = Body(Line(0), 1000, 10)
+    force = lambda t, x, v: -50 * v
+    x, v = reference(force, 1000, 10, 0.1)
+    assert body.push(0.1, force).dx == x
+    assert body.v == v
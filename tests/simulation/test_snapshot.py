@@ -0,0 +1,74 @@
+from autosim.car import ACar
+from eventloop.events import Terminate
+from simulation import Environment, Timer
+from simulation.location import Circle, CircleSpace
+import pytest
+
+
+def ring(arrays):
+    space = CircleSpace(300)
+    environment = Environment(arrays=arrays)
+    # Faster cars catch up and collide after the fork point.
+    cars = [ACar(function='1', location=Circle(space, 30.0 * i), name=str(i)) if i % 2 else
+            ACar(function=f"{10 + 10 * (i % 3)} * dt", mode=ACar.Mode.MOVEMENT, location=Circle(space, 30.0 * i), name=str(i))
+            for i in range(10)]
+    terminator = Timer(environment=environment, timeout=5, event=Terminate, kwargs={'immediate': False})
+    terminator.start()
+    environment.subscribe(terminator, *cars)
+    return environment, cars
+
+
+def run(environment) -> list:
+    trace = []
+    while True:
+        running = environment.loop.iterate()
+        trace.append([(body.name, body.location.x(), body.v) for body in environment.bodies])
+        if not running:
+            return trace
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize('arrays', [False, True])
+def test_restore_repeats_simulation(arrays):
+    environment, cars = ring(arrays)
+    for _ in range(50):
+        environment.iterate()
+    snapshot = environment.snapshot()
+
+    expected = run(environment)
+    time = environment.time
+    assert len(environment.bodies) < len(cars)
+
+    environment.restore(snapshot)
+    assert environment.bodies == sorted(cars, key=lambda car: car.location.x())
+    assert run(environment) == expected
+    assert environment.time == time
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize('arrays', [False, True])
+def test_restore_drops_objects_added_after_snapshot(arrays):
+    environment, cars = ring(arrays)
+    environment.iterate()
+    snapshot = environment.snapshot()
+
+    extra = ACar(function='1', location=Circle(CircleSpace(300), 15), name='extra')
+    environment.subscribe(extra)
+    environment.iterate()
+    assert extra in environment.bodies
+
+    environment.restore(snapshot)
+    assert extra not in environment.bodies
+    assert extra not in environment.objects
+    environment.iterate()
+    assert extra not in environment.bodies
+
+
+@pytest.mark.timeout(5)
+def test_restore_pending_objects():
+    environment, cars = ring(False)
+    snapshot = environment.snapshot()
+    first = run(environment)
+    environment.restore(snapshot)
+    assert not environment.bodies
+    assert run(environment) == first
@@ -0,0 +1,72 @@
+from autosim.car import ACar
+from autosim.simulation import Simulation, SimulationParameters
+from eventloop.events import RemoveListener
+from simulation import Body, Environment
+from simulation.environment.events import Tick, Collision
+from simulation.location import Circle, CircleSpace, Line
+from simulation.object import Object
+import pytest
+
+
+class Watcher(Object):
+    def __init__(self):
+        super().__init__()
+        self.log = []
+        self.collisions = []
+
+    def input_events(self):
+        return [Tick, Collision]
+
+    def accept(self, event):
+        if isinstance(event, Collision):
+            self.collisions.append((event.collider.name, event.collidee.name))
+            return
+        self.log.append([(b.name, b.location.x(), b.v) for b in event.environment.bodies])
+
+
+def cars(space):
+    return [ACar(function=f"{1 - 0.1 * i}", location=Circle(space, 10 * i), name=f"car-{i}") for i in range(5)]
+
+
+@pytest.mark.timeout(5)
+def test_arrays_match_objects():
+    watchers = []
+    for arrays in (False, True):
+        watcher = Watcher()
+        objects = cars(CircleSpace(60)) + [watcher]
+        Simulation(SimulationParameters(timeout=20, objects=objects, arrays=arrays)).simulate()
+        watchers.append(watcher)
+    assert watchers[0].collisions
+    assert watchers[1].collisions == watchers[0].collisions
+    assert watchers[1].log == watchers[0].log
+
+
+@pytest.mark.timeout(0.5)
+def test_bind_unbind():
+    environment = Environment(arrays=True)
+    bodies = [Body(Line(x), mass=x + 1, v=x, name=str(x)) for x in (5, 1, 3)]
+    environment.subscribe(*bodies)
+    environment.iterate()
+
+    assert environment.bodies == [bodies[1], bodies[2], bodies[0]]
+    assert list(environment.state.x) == [1, 3, 5]
+    assert list(environment.state.mass) == [2, 4, 6]
+
+    bodies[2].v = 10
+    assert environment.state.v[1] == 10
+
+    environment.put(RemoveListener(bodies[2]))
+    environment.iterate()
+    assert list(environment.state.x) == [1, 5]
+    assert bodies[0]._row == 1
+    # Removed body keeps its state.
+    assert (bodies[2].location.x(), bodies[2].v, bodies[2].mass) == (3, 10, 4)
+    assert type(bodies[2].location) is Line
+
+
+@pytest.mark.timeout(0.5)
+def test_single_space():
+    environment = Environment(arrays=True)
+    environment.subscribe(Body(Circle(CircleSpace(10), 0), 1), Body(Circle(CircleSpace(20), 5), 1))
+    with pytest.raises(RuntimeError):
+        environment.iterate()